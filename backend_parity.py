@@ -0,0 +1,137 @@
+import argparse
+import sys
+import os
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from config import config
+from detector.detector import ObjectDetector
+from detector.classifier import ObjectClassifier
+
+# Parity check between the PyTorch path and an exported backend (ONNX / OpenVINO).
+# Usage: python backend_parity.py --backend onnx --source path/to/belt.mp4 --frames 30
+
+def load_frames(source, count, stride):
+    """
+    Read up to `count` frames from a video file or a folder of images.
+    """
+    frames = []
+    if os.path.isdir(source):
+        names = sorted(f for f in os.listdir(source) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        for name in names[::stride][:count]:
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    cap = cv2.VideoCapture(source)
+    index = 0
+    while len(frames) < count:
+        grabbed, frame = cap.read()
+        if not grabbed:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+def box_iou(a, b):
+    """
+    IoU matrix between two (N, 4) and (M, 4) xyxy arrays.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+def match_detections(ref, test, min_iou):
+    """
+    Greedy one-to-one matching. Returns (matched, total_ref, total_test).
+    ref/test: (boxes, classes)
+    """
+    ref_boxes, ref_cls = ref
+    test_boxes, test_cls = test
+    iou = box_iou(ref_boxes, test_boxes)
+    # Only same-class pairs can match
+    iou[ref_cls[:, None] != test_cls[None, :]] = 0
+
+    matched = 0
+    while iou.size and iou.max() >= min_iou:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        matched += 1
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return matched, len(ref_boxes), len(test_boxes)
+
+def to_arrays(results):
+    boxes = results[0].boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros((0,), dtype=int)
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy().astype(int)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check an exported backend against the PyTorch path")
+    parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--source", required=True, help="Video file or folder of sample frames")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--stride", type=int, default=5)
+    parser.add_argument("--min-iou", type=float, default=0.9)
+    parser.add_argument("--min-recall", type=float, default=0.95,
+                        help="Required fraction of PyTorch boxes matched by the backend")
+    parser.add_argument("--min-class-agreement", type=float, default=0.98)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames, args.stride)
+    if not frames:
+        print(f"No frames read from {args.source}")
+        sys.exit(2)
+
+    # Use a non-zero confidence so both paths compare meaningful boxes
+    conf = max(config.CONF_THRESHOLD, 0.25)
+    ref_det = ObjectDetector(backend="torch")
+    test_det = ObjectDetector(backend=args.backend)
+    ref_cls = ObjectClassifier(backend="torch")
+    test_cls = ObjectClassifier(backend=args.backend)
+
+    matched = total_ref = total_test = 0
+    crops = []
+    for frame in frames:
+        ref = to_arrays(ref_det.detect(frame, conf=conf))
+        test = to_arrays(test_det.detect(frame, conf=conf))
+        m, r, t = match_detections(ref, test, args.min_iou)
+        matched += m
+        total_ref += r
+        total_test += t
+
+        for x1, y1, x2, y2 in ref[0].astype(int):
+            crop = frame[max(0, y1):y2, max(0, x1):x2]
+            if crop.size:
+                crops.append(crop)
+
+    recall = matched / total_ref if total_ref else 1.0
+    print(f"Detection: {matched}/{total_ref} PyTorch boxes matched "
+          f"(backend produced {total_test}), recall={recall:.3f}")
+
+    agreement = 1.0
+    if crops:
+        ref_preds = ref_cls.classify_batch(crops)
+        test_preds = test_cls.classify_batch(crops)
+        same = sum(1 for (a, _), (b, _) in zip(ref_preds, test_preds) if a == b)
+        agreement = same / len(crops)
+        print(f"Classification: {same}/{len(crops)} crops agree, agreement={agreement:.3f}")
+
+    ok = recall >= args.min_recall and agreement >= args.min_class_agreement
+    print("PARITY OK" if ok else "PARITY FAILED")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import time
+import sys
+import os
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from config import config
+from detector.tracker import ObjectTracker
+from detector.conveyor_tracker import iou_matrix
+
+# Compare trackers on recorded belt video.
+# Usage: python benchmark_trackers.py --source path/to/belt.mp4 --trackers botsort bytetrack conveyor
+#
+# There is no ground truth, so identity quality is estimated:
+# - handovers: a new id appears where another id was lost a few frames earlier
+#   (IoU overlap with its last box), i.e. the same orange most likely switched id
+# - short tracks: ids that lived fewer than --min-frames frames (fragments)
+
+def run(tracker_type, frames, handover_window, min_frames):
+    tracker = ObjectTracker(tracker_type=tracker_type)
+    model = tracker.model
+    if hasattr(model, "predictor"):
+        # Fresh tracker state (Ultralytics keeps trackers on the shared predictor)
+        model.predictor = None
+
+    # Warm-up so model loading/first-call overhead is not timed
+    tracker.track(frames[0].copy())
+    if tracker.conveyor:
+        tracker.conveyor.reset()
+    if hasattr(model, "predictor"):
+        model.predictor = None
+
+    first_seen = {}
+    last_seen = {} # id -> (frame index, box)
+    lengths = {}
+    handovers = 0
+    track_time = 0.0
+
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        tracks = tracker.track(frame.copy())
+        track_time += time.perf_counter() - start
+
+        current = set(int(i) for i in tracks.ids)
+        # Ids lost recently (not in this frame)
+        lost = [(tid, box) for tid, (seen, box) in last_seen.items()
+                if tid not in current and 0 < index - seen <= handover_window]
+
+        for box, tid in zip(tracks.boxes, tracks.ids):
+            tid = int(tid)
+            if tid not in first_seen:
+                first_seen[tid] = index
+                if lost:
+                    lost_boxes = np.array([b for _, b in lost], dtype=float)
+                    if iou_matrix(box[None, :].astype(float), lost_boxes).max() > 0.3:
+                        handovers += 1
+            last_seen[tid] = (index, box)
+            lengths[tid] = lengths.get(tid, 0) + 1
+
+    short = sum(1 for n in lengths.values() if n < min_frames)
+    return {
+        "tracker": tracker_type,
+        "fps": len(frames) / track_time if track_time > 0 else 0.0,
+        "ms_per_frame": 1000.0 * track_time / len(frames),
+        "ids": len(lengths),
+        "handovers": handovers,
+        "short_tracks": short,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trackers on recorded belt video")
+    parser.add_argument("--source", required=True, help="Recorded belt video")
+    parser.add_argument("--trackers", nargs="+", default=["botsort", "bytetrack", "conveyor"])
+    parser.add_argument("--max-frames", type=int, default=1000)
+    parser.add_argument("--handover-window", type=int, default=5)
+    parser.add_argument("--min-frames", type=int, default=5)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.source)
+    frames = []
+    while len(frames) < args.max_frames:
+        grabbed, frame = cap.read()
+        if not grabbed:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        print(f"No frames read from {args.source}")
+        sys.exit(2)
+
+    print(f"{len(frames)} frames from {args.source} (ROI: {config.BELT_ROI}, imgsz: {config.INFERENCE_IMGSZ})")
+    print(f"{'tracker':<12}{'fps':>8}{'ms/frame':>10}{'ids':>6}{'handovers':>11}{'short':>7}")
+    for tracker_type in args.trackers:
+        r = run(tracker_type, frames, args.handover_window, args.min_frames)
+        print(f"{r['tracker']:<12}{r['fps']:>8.1f}{r['ms_per_frame']:>10.1f}{r['ids']:>6}"
+              f"{r['handovers']:>11}{r['short_tracks']:>7}")
+
+if __name__ == "__main__":
+    main()
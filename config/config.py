@@ -11,6 +11,12 @@ MODEL_OD_PATH = "models/yolo11n.pt"
 # This model classifies cropped orange images as 'fresh' or 'rotten'.
 MODEL_CLASS_PATH = "models/best.pt"
 
+# Inference backend for both models: 'torch' (PyTorch via Ultralytics),
+# 'onnx' (ONNX Runtime) or 'openvino'. CPU-only machines are usually 2-3x
+# faster with 'onnx' or 'openvino'. Exported models are created once and
+# cached next to the weights (e.g. models/best.onnx, models/best_openvino_model/).
+INFERENCE_BACKEND = "torch"
+
 # Confidence threshold for object detection (0.0 - 1.0).
 # Detections with confidence below this value will be ignored.
 CONF_THRESHOLD = 0
@@ -38,17 +44,135 @@ FRAME_HEIGHT = 720
 # Target FPS for the camera capture.
 FPS = 30
 
+# Preallocated capture buffers. Frames are passed through the pipeline and to
+# the display without copying; a buffer is reused only after everyone released it.
+# Needs room for: latest frame + PIPELINE_QUEUE_SIZE + one per stage + display.
+FRAME_POOL_SIZE = 8
+
+# Offline mode for video-file sources (benchmarks / reproducible counts):
+# every frame is processed exactly once, as fast as possible, without
+# real-time pacing, and the run ends at the end of the file.
+# Also enabled with: python main.py --headless --offline --source video.mp4
+VIDEO_OFFLINE = False
+
+# Decoded frames buffered ahead of the pipeline in offline mode.
+OFFLINE_QUEUE_SIZE = 8
+
+# Network sources (http://, https://, rtsp://):
+# 'mjpeg'  - built-in HTTP MJPEG reader; decodes only the newest JPEG, so stale
+#            frames never queue up (recommended for IP Webcam .../video)
+# 'opencv' - cv2.VideoCapture with a 1-frame buffer, read continuously
+NETWORK_READER = "mjpeg"
+
+# Seconds without a new frame before the stream counts as failed.
+NETWORK_READ_TIMEOUT = 2.0
+
+# Reconnect backoff (seconds): starts at MIN, doubles per failure up to MAX.
+NETWORK_RECONNECT_MIN_S = 0.5
+NETWORK_RECONNECT_MAX_S = 10.0
+
+# Build the model input (belt ROI letterboxed to INFERENCE_IMGSZ, RGB float
+# tensor) and a display-size image in the capture thread, into buffers reused
+# with each pooled frame, instead of resizing on the detect and GUI threads.
+PREPROCESS_IN_CAPTURE = False
+
+# Size (w, h) of the display image made in the capture thread; overlays are
+# drawn on it and the GUI shows it directly.
+PREPROCESS_DISPLAY_SIZE = (960, 540)
+
+# Record the raw camera frames (with capture timestamps) and the serial messages
+# to RECORD_DIR/session_<time>/ for later replay. Also enabled with --record.
+# Replay by using the session folder as the source:
+#   python main.py --headless --source recordings/session_... [--offline]
+RECORD_SESSIONS = False
+RECORD_DIR = "recordings"
+
+# Size limit of one session in MB; the oldest footage is deleted beyond it.
+RECORD_MAX_MB = 4000
+
+# Size at which a session shard is closed and a new one started, in MB.
+RECORD_SHARD_MB = 256
+
+# JPEG quality for recorded frames (MJPEG streams are stored as received).
+RECORD_JPEG_QUALITY = 85
+
+# Frames waiting to be encoded/written; the oldest is dropped when full.
+RECORD_QUEUE_SIZE = 64
+
+# Belt region of interest as fractions of the frame (x1, y1, x2, y2).
+# Detection runs only on this band; boxes are mapped back to full-frame
+# coordinates for counting, drawing and crops. None = whole frame.
+# Example for a horizontal belt in the middle of the frame: (0.0, 0.3, 1.0, 0.72)
+BELT_ROI = None
+
+# Inference image size passed to the detector (int, or (h, w)).
+# None = Ultralytics default (640). Smaller is faster; a wide ROI band is
+# letterboxed to a short, wide input instead of a square one.
+INFERENCE_IMGSZ = None
+
 # =============================================================================
 # TRACKER CONFIGURATION
 # =============================================================================
-# Tracker type: 'bytetrack' or 'botsort'.
+# Tracker type: 'bytetrack', 'botsort' or 'conveyor'.
 # BoT-SORT is generally more robust but slightly slower. ByteTrack is faster.
+# 'conveyor' is a lightweight built-in tracker for a fixed camera over a belt
+# moving along COUNT_DIRECTION (no camera-motion compensation).
 TRACKER_TYPE = "botsort"
 
 # Tracker configuration file (optional, usually handled by ultralytics default).
 # If None, uses default settings.
 TRACKER_CONFIG = "botsort.yaml" 
 
+# Conveyor tracker settings (TRACKER_TYPE = 'conveyor').
+# Minimum IoU between a motion-predicted track and a detection to match them.
+CONVEYOR_MIN_IOU = 0.2
+
+# Frames a track survives without a matching detection.
+CONVEYOR_MAX_MISSES = 15
+
+# Maximum belt displacement per frame in pixels (gates centroid matching).
+CONVEYOR_MAX_SPEED_PX = 80
+
+# Allowed movement across the belt (and backwards) in pixels.
+CONVEYOR_LATERAL_TOLERANCE_PX = 30
+
+# Minimum detection confidence to start a new track.
+CONVEYOR_NEW_TRACK_CONF = 0.25
+
+# =============================================================================
+# MOTION GATE CONFIGURATION
+# =============================================================================
+# Skip detection while nothing moves inside the belt ROI (stopped/empty belt).
+# Tracks visible when the belt went idle are kept alive until motion resumes.
+MOTION_GATE_ENABLED = True
+
+# Width in pixels of the downscaled grayscale frame used for differencing.
+MOTION_GATE_WIDTH = 160
+
+# Per-pixel intensity change (0-255) that counts as motion.
+MOTION_PIXEL_THRESHOLD = 25
+
+# Fraction of changed pixels needed to consider the belt moving.
+MOTION_MIN_FRACTION = 0.002
+
+# Seconds detection keeps running after the last detected motion.
+MOTION_HOLD_TIME = 1.0
+
+# =============================================================================
+# KEYFRAME CONFIGURATION
+# =============================================================================
+# Run detection every N frames and predict boxes in between with a
+# constant-velocity model per track. 1 = detect on every frame.
+KEYFRAME_INTERVAL = 1
+
+# Also force a keyframe when predictions drift, tracks are new, or nothing
+# is tracked (so new oranges are picked up immediately).
+KEYFRAME_ADAPTIVE = True
+
+# Largest allowed prediction error (pixels) at a keyframe before the next
+# frame is forced to be a keyframe too.
+KEYFRAME_MAX_RESIDUAL_PX = 8
+
 # =============================================================================
 # COUNTING LINE CONFIGURATION
 # =============================================================================
@@ -71,12 +195,28 @@ LINE_THICKNESS = 2
 # For vertical line: 'right' (x increases) or 'left' (x decreases).
 COUNT_DIRECTION = "left"
 
+# Additional counting lines / zones (e.g. one per lane), each with its own counts.
+# Points are fractions of the frame (x, y).
+# - Line: {"name": "lane1", "type": "line", "points": [(0.7, 0.0), (0.7, 0.5)], "direction": "left"}
+#   counts tracks crossing the segment; "direction" is optional ('up'/'down'/'left'/'right').
+# - Polygon: {"name": "reject_bin", "type": "polygon", "points": [(0.1, 0.6), (0.3, 0.6), (0.3, 0.9), (0.1, 0.9)]}
+#   counts tracks entering the zone.
+COUNT_ZONES = []
+
 # =============================================================================
 # CLASSIFICATION & BUFFER CONFIGURATION
 # =============================================================================
 # Maximum number of crop images to store per tracked object.
 MAX_BUFFER_SIZE = 100
 
+# Stored crops are resized to this (width, height) and kept in one
+# preallocated array, so they never hold on to full camera frames.
+CROP_STORE_SIZE = (64, 64)
+
+# Total memory budget for stored crops of all tracks, in MB. When full, the
+# oldest crops of the track holding the most crops are evicted.
+CROP_STORE_MAX_MB = 64
+
 # Timeout in seconds to keep a track alive after it disappears from frame.
 # This helps handle temporary occlusions.
 TRACK_TIMEOUT = 2.0
@@ -84,6 +224,39 @@ TRACK_TIMEOUT = 2.0
 # Batch size for classifier inference.
 CLASSIFIER_BATCH_SIZE = 8
 
+# Accumulate crops across frames before classifying (micro-batching).
+# A batch runs as soon as it is full or its oldest crop has waited
+# CLASSIFIER_BATCH_DEADLINE_MS, so verdict latency stays bounded.
+CLASSIFIER_MICRO_BATCH = True
+CLASSIFIER_BATCH_DEADLINE_MS = 20
+
+# Per-track sampling policy (opt-in: the defaults classify every crop, as before).
+# Classify only every Nth crop of a track (1 = every crop). 2 halves the
+# classifier load at the cost of half as many votes per object.
+CLASSIFY_EVERY_N = 1
+
+# Stop classifying a track once a rotten crop has been seen (the verdict
+# cannot change any more under the ANY-rotten rule, but the logged/journaled
+# rotten/fresh frame counts stop there). Also latches rotten objects for
+# DECISION_MODE = 'confident', so enable it with that mode.
+CLASSIFY_STOP_ON_ROTTEN = False
+
+# Stop classifying a track after this many consecutive fresh votes with
+# confidence >= CLASSIFY_FRESH_CONF (e.g. 5). 0 = keep classifying fresh tracks.
+CLASSIFY_FRESH_VOTES = 0
+CLASSIFY_FRESH_CONF = 0.9
+
+# When the F/R verdict is sent to the hardware:
+# 'exit'      - when the track has been gone for TRACK_TIMEOUT (original behavior)
+# 'crossing'  - when the object crosses the counting line (~TRACK_TIMEOUT less latency)
+# 'confident' - as soon as the classification is latched (see CLASSIFY_*),
+#               or at the line at the latest
+# The timeout path always acts as a fallback and a track is never sent twice.
+DECISION_MODE = "exit"
+
+# Max seconds to wait at the line for classifications still in the micro-batcher.
+VERDICT_WAIT_TIMEOUT = 0.1
+
 # Decision rule: If ANY crop is 'rotten', the object is 'rotten'.
 # Class labels for the classifier model.
 # Swapped based on user feedback (0=fresh, 1=rotten)
@@ -98,7 +271,90 @@ NON_ORANGE_LOG_DIR = "logs/non_orange"
 # Toggle to save non-orange crops.
 SAVE_NON_ORANGE = True
 
+# Directory for all crops when "Crops" is enabled in the GUI.
+CROPS_LOG_DIR = "logs/crops"
+
+# How crops are stored:
+# 'archive' - append-only shards (<dir>/crops_*.bin + .idx) holding the JPEGs and
+#             an index of track id, class, verdict, timestamp and bbox.
+#             Export with: python utils/crop_archive.py export <dir> <out_dir>
+# 'folders' - one JPEG per crop in <dir>/<class>_<track_id>/<timestamp>.jpg
+CROP_STORAGE_FORMAT = "archive"
+
+# Size at which an archive shard is closed and a new one started, in MB.
+CROP_ARCHIVE_SHARD_MB = 64
+
+# JPEG quality (0-100) for saved crops.
+CROP_JPEG_QUALITY = 90
 
+# Crops waiting to be written by the background writer. When the disk cannot
+# keep up, the oldest queued crop is dropped (and counted in the stats).
+CROP_WRITER_QUEUE_SIZE = 256
+
+# =============================================================================
+# DISK RETENTION CONFIGURATION
+# =============================================================================
+# Directories kept within the limits below by the background retention thread.
+RETENTION_DIRS = [CROPS_LOG_DIR, NON_ORANGE_LOG_DIR]
+
+# Periodically delete old files (off by default: saved crops are never removed
+# unless an operator opts in). Set to True to enforce the limits below.
+# The GUI "Clear Logs" works even when disabled.
+RETENTION_ENABLED = False
+
+# Files older than this are deleted (None = no age limit).
+RETENTION_MAX_AGE_HOURS = 72
+
+# Total size quota for RETENTION_DIRS in MB; the oldest files are deleted first
+# (None = no quota).
+RETENTION_MAX_MB = 5000
+
+# Seconds between retention sweeps.
+RETENTION_INTERVAL = 300
+
+# Files modified within this many seconds are never deleted by a sweep
+# (e.g. the crop archive shard currently being written).
+RETENTION_MIN_FILE_AGE = 60
+
+
+
+# =============================================================================
+# EVENT JOURNAL CONFIGURATION
+# =============================================================================
+# Append counts and verdicts to <JOURNAL_DIR>/events_<date>.jsonl.
+# Query/replay with: python processing/journal.py counts|hourly|track
+JOURNAL_ENABLED = True
+
+# Directory of the journal files (not managed by the retention thread).
+JOURNAL_DIR = "logs/journal"
+
+# Seconds between batched journal writes.
+JOURNAL_FLUSH_INTERVAL = 1.0
+
+# fsync after every batch so events survive a power loss.
+JOURNAL_FSYNC = True
+
+# =============================================================================
+# PIPELINE CONFIGURATION
+# =============================================================================
+# Maximum number of tracked frames waiting between the detect/track stage
+# and the classify/decide stage. Small values keep latency low.
+PIPELINE_QUEUE_SIZE = 2
+
+# Maximum number of pending verdicts waiting to be sent to the hardware.
+ACTUATE_QUEUE_SIZE = 64
+
+# Maximum number of log messages buffered for the GUI log panel.
+LOG_QUEUE_SIZE = 1000
+
+# =============================================================================
+# HEADLESS CONFIGURATION
+# =============================================================================
+# Seconds between throughput/count reports when running with --headless.
+HEADLESS_STATS_INTERVAL = 10.0
+
+# Optional CSV file the headless reports are appended to (None = print only).
+HEADLESS_STATS_CSV = None
 
 # =============================================================================
 # GUI CONFIGURATION
@@ -109,11 +365,16 @@ WINDOW_TITLE = "Orange Detection System"
 # Refresh rate for GUI updates in milliseconds.
 GUI_REFRESH_INTERVAL = 30
 
+# Maximum video display refresh rate. The display shows the newest processed
+# frame and skips the rest, independent of the processing rate.
+DISPLAY_MAX_FPS = 20
+
 # Colors for overlays (B, G, R).
 COLOR_FRESH = (0, 255, 0)   # Green
 COLOR_ROTTEN = (0, 0, 255)  # Red
 COLOR_UNKNOWN = (255, 255, 0) # Cyan/Yellowish
 COLOR_TEXT = (255, 255, 255) # White
+COLOR_ROI = (255, 128, 0) # Blue
 
 # =============================================================================
 # SERIAL CONFIGURATION
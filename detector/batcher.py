@@ -0,0 +1,113 @@
+import threading
+import time
+import sys
+import os
+from collections import deque
+from concurrent.futures import Future
+
+# Add project root to path to allow importing config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+class ClassificationBatcher:
+    """
+    Micro-batcher in front of ObjectClassifier.
+    Crops are accumulated across frames and classified together once the batch is
+    full or the oldest queued crop has waited for the deadline, whichever comes first.
+    Each submitted crop gets a Future resolving to (class_id, confidence).
+    """
+    def __init__(self, classifier, batch_size=None, deadline=None):
+        self.classifier = classifier
+        self.batch_size = batch_size if batch_size else config.CLASSIFIER_BATCH_SIZE
+        self.deadline = deadline if deadline is not None else config.CLASSIFIER_BATCH_DEADLINE_MS / 1000.0
+
+        self.pending = deque() # (crop, future, submit_time)
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Stats
+        self.batches_run = 0
+        self.crops_classified = 0
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="classifier-batcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+        # Anything left will never be classified
+        with self.cond:
+            while self.pending:
+                _, future, _ = self.pending.popleft()
+                future.cancel()
+
+    def submit(self, crop):
+        """
+        Queue a crop for classification. Returns a Future.
+        """
+        future = Future()
+        with self.cond:
+            self.pending.append((crop, future, time.monotonic()))
+            self.cond.notify()
+        return future
+
+    def next_batch(self):
+        """
+        Block until a batch is ready (full or past its deadline).
+        Returns an empty list when the batcher is stopped.
+        """
+        with self.cond:
+            while self.running and not self.pending:
+                self.cond.wait()
+
+            while self.running and len(self.pending) < self.batch_size:
+                remaining = self.pending[0][2] + self.deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+
+            if not self.running:
+                return []
+
+            count = min(self.batch_size, len(self.pending))
+            return [self.pending.popleft() for _ in range(count)]
+
+    def run(self):
+        while self.running:
+            batch = self.next_batch()
+            if not batch:
+                continue
+
+            futures, crops = [], []
+            for crop, future, _ in batch:
+                # Skip crops whose caller cancelled in the meantime
+                if future.set_running_or_notify_cancel():
+                    futures.append(future)
+                    crops.append(crop)
+            if not crops:
+                continue
+
+            try:
+                preds = self.classifier.classify_batch(crops, batch_size=len(crops))
+                if len(preds) != len(crops):
+                    raise RuntimeError(f"Classifier returned {len(preds)} results for {len(crops)} crops")
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, pred in zip(futures, preds):
+                future.set_result(pred)
+
+            self.batches_run += 1
+            self.crops_classified += len(crops)
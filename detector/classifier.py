@@ -1,4 +1,3 @@
-from ultralytics import YOLO
 import sys
 import os
 import torch
@@ -6,36 +5,47 @@ import torch
 # Add project root to path to allow importing config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
+from detector.registry import registry
 
 class ObjectClassifier:
     """
     Wrapper for the classification model (Fresh vs Rotten).
     """
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend=None):
         self.model_path = model_path if model_path else config.MODEL_CLASS_PATH
-        print(f"Loading Classification Model from: {self.model_path}")
-        self.model = YOLO(self.model_path)
+        self.backend = backend if backend else config.INFERENCE_BACKEND
 
-    def classify_batch(self, crops):
+    @property
+    def model(self):
+        # Loaded lazily on the first classification
+        return registry.get(self.model_path, self.backend)
+
+    def classify_batch(self, crops, batch_size=None):
         """
         Run classification on a batch of cropped images.
         crops: List of numpy arrays (images).
-        Returns: List of result objects or labels.
+        batch_size: Max crops per model call (defaults to config.CLASSIFIER_BATCH_SIZE).
+        Returns: List of (class_id, confidence), in the same order as crops.
         """
         if not self.model or not crops:
             return []
 
-        # Run inference
-        # verbose=False to reduce log noise
-        results = self.model.predict(source=crops, verbose=False, batch=len(crops))
+        batch_size = batch_size if batch_size else config.CLASSIFIER_BATCH_SIZE
         
-        # Extract class indices/names
-        # Assuming binary classification: 0=rotten, 1=fresh (or defined in config)
         predictions = []
-        for r in results:
-            # probs is a tensor, get the top class
-            top_class_id = r.probs.top1
-            conf = r.probs.top1conf.item()
-            predictions.append((top_class_id, conf))
+        for start in range(0, len(crops), batch_size):
+            chunk = crops[start:start + batch_size]
+            
+            # Run inference
+            # verbose=False to reduce log noise
+            results = self.model.predict(source=chunk, verbose=False, batch=len(chunk))
+            
+            # Extract class indices/names
+            # Assuming binary classification: 0=fresh, 1=rotten (defined in config)
+            for r in results:
+                # probs is a tensor, get the top class
+                top_class_id = r.probs.top1
+                conf = r.probs.top1conf.item()
+                predictions.append((top_class_id, conf))
             
         return predictions
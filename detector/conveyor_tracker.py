@@ -0,0 +1,182 @@
+import numpy as np
+import sys
+import os
+
+# Add project root to path to allow importing config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+def iou_matrix(a, b):
+    """
+    IoU between every box of a (N, 4) and b (M, 4), both xyxy.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+def greedy_match(score, min_score):
+    """
+    Greedy one-to-one assignment on a score matrix (highest first).
+    Returns a list of (row, col) pairs.
+    """
+    pairs = []
+    if score.size == 0:
+        return pairs
+    rows, cols = np.nonzero(score >= min_score)
+    order = np.argsort(-score[rows, cols], kind="stable")
+    used_rows, used_cols = set(), set()
+    for k in order:
+        r, c = rows[k], cols[k]
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((r, c))
+    return pairs
+
+class ConveyorTracker:
+    """
+    Lightweight tracker for a fixed camera over a belt moving in one direction.
+    Tracks are predicted along the belt axis with a 1-D velocity (sign given by
+    COUNT_DIRECTION), then associated with detections by IoU and, for the rest,
+    by gated centroid distance. No camera-motion compensation or appearance model.
+    """
+    def __init__(self, direction=None, min_iou=None, max_misses=None, max_speed=None,
+                 lateral_tolerance=None, new_track_conf=None):
+        direction = direction if direction else config.COUNT_DIRECTION
+        # Belt axis (0 = x, 1 = y) and expected sign of motion along it
+        self.axis = 1 if direction in ("up", "down") else 0
+        self.sign = -1.0 if direction in ("up", "left") else 1.0
+
+        self.min_iou = min_iou if min_iou is not None else config.CONVEYOR_MIN_IOU
+        self.max_misses = max_misses if max_misses is not None else config.CONVEYOR_MAX_MISSES
+        self.max_speed = max_speed if max_speed is not None else config.CONVEYOR_MAX_SPEED_PX
+        self.lateral_tolerance = lateral_tolerance if lateral_tolerance is not None else config.CONVEYOR_LATERAL_TOLERANCE_PX
+        self.new_track_conf = new_track_conf if new_track_conf is not None else config.CONVEYOR_NEW_TRACK_CONF
+
+        self.reset()
+
+    def reset(self):
+        """
+        Drop all tracks (ids keep increasing so they are never reused).
+        """
+        # Track state, one row per live track
+        self.ids = np.zeros((0,), dtype=int)
+        self.boxes = np.zeros((0, 4), dtype=float)
+        self.clss = np.zeros((0,), dtype=int)
+        self.speed = np.zeros((0,), dtype=float) # px per frame along the belt axis
+        self.misses = np.zeros((0,), dtype=int) # frames since last matched
+        if not hasattr(self, "next_id"):
+            self.next_id = 1
+
+    def predicted_boxes(self):
+        shift = self.speed * (self.misses + 1)
+        boxes = self.boxes.copy()
+        boxes[:, self.axis] += shift
+        boxes[:, self.axis + 2] += shift
+        return boxes
+
+    def centroid_score(self, predicted, det_boxes, misses):
+        """
+        Gated centroid similarity in (0, 1]; 0 where the motion is implausible.
+        misses: frames since each predicted track was last matched (same rows).
+        """
+        if len(predicted) == 0 or len(det_boxes) == 0:
+            return np.zeros((len(predicted), len(det_boxes)))
+        pc = (predicted[:, :2] + predicted[:, 2:]) / 2
+        dc = (det_boxes[:, :2] + det_boxes[:, 2:]) / 2
+        delta = dc[None, :, :] - pc[:, None, :]
+
+        along = delta[:, :, self.axis] * self.sign
+        across = np.abs(delta[:, :, 1 - self.axis])
+        reach = self.max_speed * (misses[:, None] + 1)
+        ok = (along >= -self.lateral_tolerance) & (along <= reach) & (across <= self.lateral_tolerance)
+
+        dist = np.hypot(delta[:, :, 0], delta[:, :, 1])
+        return np.where(ok, 1.0 / (1.0 + dist), 0.0)
+
+    def update(self, boxes, confs, clss):
+        """
+        Associate one frame of detections (xyxy, full-frame coordinates).
+        Returns (boxes, ids, clss, confs) for the tracks matched or created this frame.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        confs = np.asarray(confs, dtype=float).reshape(-1)
+        clss = np.asarray(clss, dtype=int).reshape(-1)
+
+        predicted = self.predicted_boxes()
+
+        # 1) IoU against motion-predicted boxes
+        pairs = greedy_match(iou_matrix(predicted, boxes), self.min_iou)
+
+        # 2) Gated centroid distance for whatever is left
+        matched_t = {t for t, _ in pairs}
+        matched_d = {d for _, d in pairs}
+        rest_t = np.array([t for t in range(len(self.ids)) if t not in matched_t], dtype=int)
+        rest_d = np.array([d for d in range(len(boxes)) if d not in matched_d], dtype=int)
+        if len(rest_t) and len(rest_d):
+            score = self.centroid_score(predicted[rest_t], boxes[rest_d], self.misses[rest_t])
+            for r, c in greedy_match(score, 1e-9):
+                pairs.append((rest_t[r], rest_d[c]))
+
+        out_rows = []
+
+        # Update matched tracks
+        matched_t = np.array([t for t, _ in pairs], dtype=int)
+        matched_d = np.array([d for _, d in pairs], dtype=int)
+        if len(pairs):
+            old_c = (self.boxes[matched_t, self.axis] + self.boxes[matched_t, self.axis + 2]) / 2
+            new_c = (boxes[matched_d, self.axis] + boxes[matched_d, self.axis + 2]) / 2
+            observed = (new_c - old_c) / (self.misses[matched_t] + 1)
+            # Smooth the belt speed; the first observation is taken as is
+            fresh = self.speed[matched_t] == 0
+            self.speed[matched_t] = np.where(fresh, observed, 0.7 * self.speed[matched_t] + 0.3 * observed)
+            self.boxes[matched_t] = boxes[matched_d]
+            self.misses[matched_t] = 0
+            out_rows.extend(zip(matched_t, matched_d))
+
+        # Age unmatched tracks
+        unmatched = np.ones(len(self.ids), dtype=bool)
+        unmatched[matched_t] = False
+        self.misses[unmatched] += 1
+
+        # New tracks from confident unmatched detections
+        new_d = np.ones(len(boxes), dtype=bool)
+        new_d[matched_d] = False
+        new_d &= confs >= self.new_track_conf
+        new_idx = np.nonzero(new_d)[0]
+        if len(new_idx):
+            start = len(self.ids)
+            new_ids = np.arange(self.next_id, self.next_id + len(new_idx))
+            self.next_id += len(new_idx)
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, boxes[new_idx]])
+            self.clss = np.concatenate([self.clss, clss[new_idx]])
+            self.speed = np.concatenate([self.speed, np.zeros(len(new_idx))])
+            self.misses = np.concatenate([self.misses, np.zeros(len(new_idx), dtype=int)])
+            out_rows.extend(zip(range(start, start + len(new_idx)), new_idx))
+
+        # Gather output before dropping stale tracks (row indices are still valid)
+        if out_rows:
+            t_idx = np.array([t for t, _ in out_rows], dtype=int)
+            d_idx = np.array([d for _, d in out_rows], dtype=int)
+            result = (boxes[d_idx], self.ids[t_idx].copy(), self.clss[t_idx].copy(), confs[d_idx])
+        else:
+            result = (np.zeros((0, 4)), np.zeros((0,), dtype=int), np.zeros((0,), dtype=int), np.zeros((0,)))
+
+        keep = self.misses <= self.max_misses
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.boxes = self.boxes[keep]
+            self.clss = self.clss[keep]
+            self.speed = self.speed[keep]
+            self.misses = self.misses[keep]
+
+        return result
@@ -1,19 +1,23 @@
-from ultralytics import YOLO
 import sys
 import os
 
 # Add project root to path to allow importing config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
+from detector.registry import registry
 
 class ObjectDetector:
     """
     Wrapper for YOLOv8 object detection model.
     """
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend=None):
         self.model_path = model_path if model_path else config.MODEL_OD_PATH
-        print(f"Loading Object Detection Model from: {self.model_path}")
-        self.model = YOLO(self.model_path)
+        self.backend = backend if backend else config.INFERENCE_BACKEND
+
+    @property
+    def model(self):
+        # Loaded on first use and shared with the conveyor tracker through the registry
+        return registry.get(self.model_path, self.backend)
 
     def detect(self, frame, conf=None, iou=None):
         """
@@ -0,0 +1,115 @@
+import numpy as np
+import sys
+import os
+
+# Add project root to path to allow importing config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from detector.tracker import Tracks
+
+class KeyframeTracker:
+    """
+    Runs the wrapped tracker only on keyframes and propagates boxes in between
+    with a per-track constant-velocity prediction (oranges on a belt move at a
+    nearly constant speed). Returns Tracks for every frame, like ObjectTracker.
+
+    Detection runs every KEYFRAME_INTERVAL frames. With KEYFRAME_ADAPTIVE, the
+    next frame is also a keyframe whenever the prediction was off by more than
+    KEYFRAME_MAX_RESIDUAL_PX, a track has no velocity estimate yet, or no
+    objects are tracked (new objects can only appear through detection).
+    """
+    def __init__(self, tracker, interval=None, adaptive=None, max_residual=None):
+        self.tracker = tracker
+        self.interval = interval if interval else config.KEYFRAME_INTERVAL
+        self.adaptive = adaptive if adaptive is not None else config.KEYFRAME_ADAPTIVE
+        self.max_residual = max_residual if max_residual is not None else config.KEYFRAME_MAX_RESIDUAL_PX
+
+        self.last = None # Tracks of the last keyframe
+        self.key_boxes = {} # track_id -> float xyxy at the last keyframe
+        self.velocity = {} # track_id -> float xyxy change per frame
+        self.frames_since_key = 0
+        self.force_key = True
+
+        # Stats
+        self.keyframes = 0
+        self.predicted_frames = 0
+
+    @property
+    def roi(self):
+        return self.tracker.roi
+
+    def force_keyframe(self):
+        """
+        Make the next frame a keyframe (e.g. after frames were skipped).
+        """
+        self.force_key = True
+
+    def needs_keyframe(self):
+        if self.force_key or self.last is None or len(self.last) == 0:
+            return True
+        return self.frames_since_key + 1 >= self.interval
+
+    def track(self, frame, model_input=None, letterbox=None):
+        if self.interval <= 1:
+            return self.tracker.track(frame, model_input=model_input, letterbox=letterbox)
+        if self.needs_keyframe():
+            return self.keyframe(frame, model_input, letterbox)
+        return self.predict(frame)
+
+    def keyframe(self, frame, model_input=None, letterbox=None):
+        tracks = self.tracker.track(frame, model_input=model_input, letterbox=letterbox)
+        elapsed = self.frames_since_key + 1 # frames since the previous keyframe
+
+        residual = 0.0
+        missing_velocity = False
+        key_boxes = {}
+        velocity = {}
+        for box, track_id in zip(tracks.boxes, tracks.ids):
+            box = box.astype(float)
+            key_boxes[track_id] = box
+
+            prev = self.key_boxes.get(track_id)
+            if prev is None:
+                missing_velocity = True
+                continue
+
+            old_v = self.velocity.get(track_id)
+            if old_v is not None:
+                predicted = prev + old_v * elapsed
+                residual = max(residual, float(np.abs(box - predicted).max()))
+            velocity[track_id] = (box - prev) / elapsed
+
+        self.key_boxes = key_boxes
+        self.velocity = velocity
+        self.last = tracks
+        self.frames_since_key = 0
+        self.force_key = self.adaptive and (missing_velocity or residual > self.max_residual)
+        self.keyframes += 1
+        return tracks
+
+    def predict(self, frame):
+        self.frames_since_key += 1
+        k = self.frames_since_key
+        h, w = frame.shape[:2]
+
+        keep = []
+        boxes = []
+        for i, track_id in enumerate(self.last.ids):
+            box = self.key_boxes[track_id] + self.velocity.get(track_id, 0.0) * k
+            # Drop tracks predicted to have left the frame
+            if box[2] <= 0 or box[0] >= w or box[3] <= 0 or box[1] >= h:
+                continue
+            keep.append(i)
+            boxes.append(box)
+
+        self.predicted_frames += 1
+        if not keep:
+            # Everything left; detect again on the next frame
+            self.force_key = True
+            return Tracks.empty(self.last.names)
+
+        return Tracks(np.round(np.array(boxes)).astype(int),
+                      self.last.ids[keep],
+                      self.last.clss[keep],
+                      self.last.confs[keep],
+                      self.last.names)
@@ -0,0 +1,118 @@
+from ultralytics import YOLO
+import threading
+import shutil
+import time
+import sys
+import os
+
+# Add project root to path to allow importing config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+# Ultralytics export format and artifact name for each non-torch backend
+BACKENDS = {
+    "onnx": ("onnx", "{stem}.onnx"),
+    "openvino": ("openvino", "{stem}_openvino_model"),
+}
+
+class ModelRegistry:
+    """
+    Loads each weights file once, lazily on first use, and shares the instance
+    between predict-only wrappers (ObjectDetector, the conveyor tracker path).
+    Models are keyed by (path, backend, role); non-torch backends are exported
+    once and cached next to the weights, so every role loads the same artifact.
+    model.track() registers tracker callbacks and a persisted predictor on its
+    instance, so Ultralytics tracking uses its own role ("track") and never
+    leaks tracker state into predict() calls.
+    """
+    def __init__(self):
+        self.models = {} # (abs path, backend, role) -> YOLO
+        self.info = {} # (abs path, backend, role) -> {"load_time": seconds, "memory_bytes": int, "artifact": path}
+        self.lock = threading.Lock()
+
+    def get(self, path, backend=None, role="predict"):
+        backend = backend if backend else config.INFERENCE_BACKEND
+        key = (os.path.abspath(path), backend, role)
+        with self.lock:
+            model = self.models.get(key)
+            if model is None:
+                print(f"Loading model from: {path} (backend: {backend}, {role})")
+                start = time.perf_counter()
+                model, artifact = self.load(path, backend)
+                load_time = time.perf_counter() - start
+
+                self.models[key] = model
+                self.info[key] = {
+                    "load_time": load_time,
+                    "memory_bytes": self.model_memory(model, artifact),
+                    "artifact": artifact,
+                }
+                print(f"Loaded {os.path.basename(artifact)} in {load_time:.2f}s "
+                      f"({self.info[key]['memory_bytes'] / 1e6:.1f} MB)")
+            return model
+
+    def load(self, path, backend):
+        """
+        Returns (model, artifact_path) for the requested backend.
+        """
+        if backend == "torch":
+            return YOLO(path), path
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        export_format, artifact_name = BACKENDS[backend]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        artifact = os.path.join(os.path.dirname(path), artifact_name.format(stem=stem))
+
+        # Re-export only if the cached artifact is missing or older than the weights
+        torch_model = YOLO(path)
+        task = torch_model.task
+        if not os.path.exists(artifact) or os.path.getmtime(artifact) < os.path.getmtime(path):
+            print(f"Exporting {path} to {backend} (one-time)...")
+            # dynamic=True keeps the batch dimension free for classifier batches
+            exported = torch_model.export(format=export_format, dynamic=True)
+            if os.path.abspath(exported) != os.path.abspath(artifact):
+                if os.path.isdir(artifact):
+                    shutil.rmtree(artifact)
+                os.replace(exported, artifact)
+        del torch_model
+
+        return YOLO(artifact, task=task), artifact
+
+    def is_loaded(self, path, backend=None, role="predict"):
+        backend = backend if backend else config.INFERENCE_BACKEND
+        return (os.path.abspath(path), backend, role) in self.models
+
+    @staticmethod
+    def model_memory(model, artifact=None):
+        """
+        Approximate footprint of a model's weights and buffers in bytes.
+        Exported backends do not expose torch tensors, so their artifact size is used.
+        """
+        try:
+            net = model.model
+            tensors = list(net.parameters()) + list(net.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            pass
+
+        if artifact and os.path.isfile(artifact):
+            return os.path.getsize(artifact)
+        if artifact and os.path.isdir(artifact):
+            return sum(os.path.getsize(os.path.join(artifact, f)) for f in os.listdir(artifact))
+        return 0
+
+    def stats(self):
+        """
+        Per-model load time and memory footprint, keyed by "path [backend, role]".
+        """
+        with self.lock:
+            return {f"{path} [{backend}, {role}]": dict(info)
+                    for (path, backend, role), info in self.info.items()}
+
+    def total_memory(self):
+        with self.lock:
+            return sum(info["memory_bytes"] for info in self.info.values())
+
+# Process-wide registry used by the detector, tracker and classifier wrappers
+registry = ModelRegistry()
@@ -1,40 +1,129 @@
-from ultralytics import YOLO
+import numpy as np
 import sys
 import os
+import torch
 
 # Add project root to path to allow importing config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
+from detector.registry import registry
+from detector.conveyor_tracker import ConveyorTracker
+
+class Tracks:
+    """
+    Tracked objects of one frame, in full-frame pixel coordinates.
+    """
+    def __init__(self, boxes, ids, clss, confs, names):
+        self.boxes = boxes # (N, 4) int xyxy
+        self.ids = ids # (N,) int track ids
+        self.clss = clss # (N,) int OD class ids
+        self.confs = confs # (N,) float detection confidences
+        self.names = names # class id -> class name
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.zeros((0, 4), dtype=int), np.zeros((0,), dtype=int),
+                   np.zeros((0,), dtype=int), np.zeros((0,), dtype=float), names or {})
+
+    @classmethod
+    def from_results(cls, results, offset=(0, 0), letterbox=None):
+        """
+        Convert Ultralytics tracking results, shifting boxes by the ROI offset (x, y),
+        or mapping them back through the letterbox of a preprocessed model input.
+        """
+        if not results:
+            return cls.empty()
+        boxes = results[0].boxes
+        names = results[0].names
+        if boxes is None or boxes.id is None:
+            return cls.empty(names)
+
+        xyxy = boxes.xyxy.cpu().numpy()
+        if letterbox is not None:
+            xyxy = letterbox.to_frame(xyxy)
+        else:
+            ox, oy = offset
+            if ox or oy:
+                xyxy = xyxy + np.array([ox, oy, ox, oy], dtype=xyxy.dtype)
+
+        return cls(xyxy.astype(int),
+                   boxes.id.cpu().numpy().astype(int),
+                   boxes.cls.cpu().numpy().astype(int),
+                   boxes.conf.cpu().numpy(),
+                   names)
+
+def roi_to_pixels(roi, frame_shape):
+    """
+    Convert a fractional (x1, y1, x2, y2) ROI to pixel coordinates for a frame.
+    Returns None for the full frame.
+    """
+    if roi is None:
+        return None
+    h, w = frame_shape[:2]
+    x1, y1, x2, y2 = roi
+    x1, x2 = int(round(x1 * w)), int(round(x2 * w))
+    y1, y2 = int(round(y1 * h)), int(round(y2 * h))
+    x1, y1 = max(0, min(x1, w - 1)), max(0, min(y1, h - 1))
+    x2, y2 = max(x1 + 1, min(x2, w)), max(y1 + 1, min(y2, h))
+    return x1, y1, x2, y2
 
 class ObjectTracker:
     """
-    Wrapper for YOLOv8 tracking (BoT-SORT / ByteTrack).
+    Wrapper for YOLOv8 tracking (BoT-SORT / ByteTrack, or the built-in 'conveyor' tracker).
+    Runs only on the configured belt ROI and returns Tracks in full-frame coordinates.
     """
-    def __init__(self, model_path=None, tracker_type=None):
+    def __init__(self, model_path=None, tracker_type=None, backend=None, roi=None, imgsz=None):
         self.model_path = model_path if model_path else config.MODEL_OD_PATH
         self.tracker_type = tracker_type if tracker_type else config.TRACKER_TYPE
-        
-        # We use the same model as detector, or load a new instance.
-        # To save memory, we could pass the model instance, but for simplicity/modularity
-        # we'll load it here or allow passing it.
-        # For this implementation, let's assume we load it here to be self-contained 
-        # or we could accept an existing ObjectDetector instance.
-        # Let's load it to be safe and simple.
-        print(f"Loading Tracker Model from: {self.model_path}")
-        self.model = YOLO(self.model_path)
-
-    def track(self, frame, conf=None, iou=None, persist=True):
+        self.backend = backend if backend else config.INFERENCE_BACKEND
+        self.roi = roi if roi is not None else config.BELT_ROI
+        self.imgsz = imgsz if imgsz is not None else config.INFERENCE_IMGSZ
+        self.conveyor = ConveyorTracker() if self.tracker_type == "conveyor" else None
+
+    @property
+    def model(self):
+        # model.track() attaches tracker callbacks and state to its instance, so it
+        # gets its own; the conveyor path only predicts and shares ObjectDetector's.
+        role = "predict" if self.conveyor else "track"
+        return registry.get(self.model_path, self.backend, role)
+
+    def track(self, frame, conf=None, iou=None, persist=True, model_input=None, letterbox=None):
         """
         Run tracking on a frame.
         persist=True is crucial for video tracking to maintain IDs.
+        model_input/letterbox: tensor prepared in the capture thread (utils.preprocess);
+        used instead of letterboxing the frame here when it matches this tracker's ROI.
+        Returns a Tracks instance.
         """
         conf = conf if conf is not None else config.CONF_THRESHOLD
         iou = iou if iou is not None else config.IOU_THRESHOLD
-        
+
+        kwargs = {}
+        offset = (0, 0)
+        if model_input is not None and letterbox is not None and letterbox.roi == self.roi:
+            # Already cropped, letterboxed, RGB and normalized (BCHW, zero-copy)
+            frame = torch.from_numpy(model_input).unsqueeze(0)
+        else:
+            letterbox = None
+            # Only the belt band is fed to the model
+            roi = roi_to_pixels(self.roi, frame.shape)
+            if roi is not None:
+                x1, y1, x2, y2 = roi
+                frame = frame[y1:y2, x1:x2]
+                offset = (x1, y1)
+            if self.imgsz:
+                kwargs["imgsz"] = self.imgsz
+
+        if self.conveyor:
+            return self.track_conveyor(frame, conf, iou, offset, kwargs, letterbox)
+
         # tracker argument expects a yaml file or name like 'bytetrack.yaml'
         # Ultralytics comes with 'bytetrack.yaml' and 'botsort.yaml'
         tracker_config = f"{self.tracker_type}.yaml"
-        
+
         results = self.model.track(
             source=frame,
             conf=conf,
@@ -42,6 +131,35 @@ class ObjectTracker:
             classes=config.DETECT_CLASS_IDS,
             persist=persist,
             tracker=tracker_config,
-            verbose=False
+            verbose=False,
+            **kwargs
+        )
+        return Tracks.from_results(results, offset, letterbox)
+
+    def track_conveyor(self, frame, conf, iou, offset, kwargs, letterbox=None):
+        """
+        Plain detection followed by the built-in ConveyorTracker association.
+        """
+        results = self.model.predict(
+            source=frame,
+            conf=conf,
+            iou=iou,
+            classes=config.DETECT_CLASS_IDS,
+            verbose=False,
+            **kwargs
         )
-        return results
+        if not results or results[0].boxes is None:
+            return Tracks.empty()
+
+        det = results[0].boxes
+        xyxy = det.xyxy.cpu().numpy()
+        if letterbox is not None:
+            xyxy = letterbox.to_frame(xyxy)
+        else:
+            ox, oy = offset
+            if ox or oy:
+                xyxy = xyxy + np.array([ox, oy, ox, oy], dtype=xyxy.dtype)
+
+        boxes, ids, clss, confs = self.conveyor.update(
+            xyxy, det.conf.cpu().numpy(), det.cls.cpu().numpy().astype(int))
+        return Tracks(boxes.astype(int), ids, clss, confs, results[0].names)
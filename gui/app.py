@@ -1,22 +1,14 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import cv2
-import time
 import sys
 import os
-import shutil
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
 from utils.video import VideoInput
-from detector.detector import ObjectDetector
-from detector.tracker import ObjectTracker
-from detector.classifier import ObjectClassifier
-from processing.object_buffer import ObjectAggregator
-from processing.counting import LineCounter
-from utils.drawing import draw_boxes, draw_counting_line, draw_info
+from processing.pipeline import Pipeline
 from gui.widgets import LogPanel, ControlPanel, StatsPanel
+from gui.renderer import VideoRenderer
 from hardware.serial_comm import SerialCommunicator
 
 # Set theme and color
@@ -38,33 +30,36 @@ class App:
         
         self.app_running = True
         self.after_id = None
+        self.video_after_id = None
         self.belt_status = "Stopped"  # Initial status
         
         # Initialize components
         self.video = VideoInput(source=config.CAMERA_ID, width=config.FRAME_WIDTH, 
                                height=config.FRAME_HEIGHT, fps=config.FPS)
-        self.tracker = ObjectTracker() 
-        self.classifier = ObjectClassifier()
-        self.aggregator = ObjectAggregator()
-        self.line_counter = LineCounter(width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT)
         
         # Initialize Serial
         self.serial = SerialCommunicator(port=config.SERIAL_PORT, baud_rate=config.BAUD_RATE)
+        if self.video.recorder:
+            self.serial.on_send = self.video.recorder.record_event
+        
+        # Detection, classification and actuation run off the Tk main loop
+        self.pipeline = Pipeline(self.video, serial=self.serial)
+        self.last_counts = None
         
         self.running = False
-        self.od_enabled = True
-        self.class_enabled = True
-        self.save_crops_enabled = False
         
         # GUI Layout
         self.setup_ui()
         
-        # Start update loop
+        # Start update loops (logs, and the video display at its own capped FPS)
+        self.renderer = VideoRenderer(self.video_label)
         self.after_id = self.root.after(config.GUI_REFRESH_INTERVAL, self.update_gui)
+        self.video_after_id = self.root.after(self.renderer.interval_ms(), self.update_video)
         
 
         # Auto-start camera
         self.video.start()
+        self.pipeline.start()
         self.running = True
         self.log("Camera started successfully")
         self.update_status_bar()
@@ -258,157 +253,65 @@ class App:
             self.logs.grid_remove()
 
     def toggle_od(self, value):
-        self.od_enabled = value
+        self.pipeline.od_enabled = value
         state = "enabled" if value else "disabled"
         icon = "ON" if value else "OFF"
         self.log(f"[{icon}] Object Detection {state}")
 
     def toggle_class(self, value):
-        self.class_enabled = value
+        self.pipeline.class_enabled = value
         state = "enabled" if value else "disabled"
         icon = "ON" if value else "OFF"
         self.log(f"[{icon}] Classification {state}")
 
     def toggle_save_crops(self, value):
-        self.save_crops_enabled = value
+        self.pipeline.save_crops_enabled = value
         icon = "ON" if value else "OFF"
         self.log(f"[{icon}] Save All Crops: {value}")
 
     def clear_logs(self):
         dirs_to_clear = [
-            os.path.join("logs", "crops"),
+            config.CROPS_LOG_DIR,
             config.NON_ORANGE_LOG_DIR
         ]
         
-        for d in dirs_to_clear:
-            if os.path.exists(d):
-                shutil.rmtree(d)
-                os.makedirs(d, exist_ok=True)
-        
-        self.log("Logs cleared successfully")
+        # Deleted on the retention thread; it logs the freed space when done
+        self.pipeline.retention.request_clear(dirs_to_clear)
+        self.log("Clearing logs in the background...")
 
     def update_gui(self):
         if not self.app_running:
             return
             
         if self.running:
-            frame = self.video.read()
-            if frame is None:
-                pass
-            else:
-                if self.od_enabled:
-                    results = self.tracker.track(frame)
-                    
-                    if results and results[0].boxes and results[0].boxes.id is not None:
-                        boxes = results[0].boxes.xyxy.cpu().numpy()
-                        ids = results[0].boxes.id.cpu().numpy().astype(int)
-                        clss = results[0].boxes.cls.cpu().numpy().astype(int)
-                        names = results[0].names
-                        
-                        for box, track_id, cls in zip(boxes, ids, clss):
-                            x1, y1, x2, y2 = box.astype(int)
-                            h, w = frame.shape[:2]
-                            x1, y1 = max(0, x1), max(0, y1)
-                            x2, y2 = min(w, x2), min(h, y2)
-                            
-                            crop = frame[y1:y2, x1:x2]
-                            if crop.size == 0:
-                                continue
-                            
-                            is_new = track_id not in self.aggregator.buffers
-                            buf = self.aggregator.update(track_id, crop)
-                            
-                            if is_new:
-                                class_name = names[cls]
-                                buf.od_class_name = class_name
-                            
-                            if buf.od_class_name != "orange":
-                                folder_name = f"{buf.od_class_name}_{track_id}"
-                                folder_path = os.path.join(config.NON_ORANGE_LOG_DIR, folder_name)
-                                os.makedirs(folder_path, exist_ok=True)
-                                
-                                timestamp = int(time.time() * 1000)
-                                img_name = f"{timestamp}.jpg"
-                                cv2.imwrite(os.path.join(folder_path, img_name), crop)
-
-                            if self.save_crops_enabled:
-                                folder_name = f"{buf.od_class_name}_{track_id}"
-                                folder_path = os.path.join("logs", "crops", folder_name)
-                                os.makedirs(folder_path, exist_ok=True)
-                                
-                                timestamp = int(time.time() * 1000)
-                                img_name = f"{timestamp}.jpg"
-                                cv2.imwrite(os.path.join(folder_path, img_name), crop)
-
-                            if self.class_enabled and self.classifier.model:
-                                preds = self.classifier.classify_batch([crop])
-                                if preds:
-                                    label_id, conf = preds[0]
-                                    buf.update_classification(label_id)
-                            
-                            centroid = ((x1 + x2) // 2, (y1 + y2) // 2)
-                            prev_centroid = getattr(buf, 'last_centroid', None)
-                            buf.last_centroid = centroid
-                            
-                            if self.line_counter.check_crossing(track_id, centroid, prev_centroid):
-                                if buf.od_class_name == "orange":
-                                    label = "rotten" if buf.classification_result == 1 else "fresh"
-                                else:
-                                    label = "non_orange"
-                                self.line_counter.increment(label)
-                                self.stats_panel.update_chart(self.line_counter.get_counts())
-
-                    removed_buffers = self.aggregator.cleanup()
-                    for buf in removed_buffers:
-                        # Logic: 
-                        # - If not orange -> 'R'
-                        # - If orange and rotten -> 'R'
-                        # - If orange and fresh -> 'F'
-                        
-                        serial_val = 'R'
-                        log_label = "Non-orange/Rotten"
-                        
-                        if buf.od_class_name == "orange":
-                            if not buf.is_rotten:
-                                serial_val = 'F'
-                                log_label = "Fresh"
-                            else:
-                                serial_val = 'R'
-                                log_label = "Rotten"
-                        else:
-                            serial_val = 'R'
-                            log_label = "Non-orange"
-                        
-                        # Send the character
-                        self.serial.send_classification(serial_val)
-
-                        self.log("-" * 40)
-                        self.log(f"Object {buf.track_id} exited")
-                        self.log(f"   Frames seen: {buf.total_frames}")
-                        self.log(f"   Class: {buf.od_class_name}")
-                        self.log(f"   Verdict: {log_label} -> Sending '{serial_val}'")
+            # Messages produced by the pipeline workers
+            for msg in self.pipeline.get_logs():
+                self.logs.log(msg)
+            
+        if self.app_running:
+            self.after_id = self.root.after(config.GUI_REFRESH_INTERVAL, self.update_gui)
 
-                    frame = draw_boxes(frame, results, self.aggregator.buffers)
-                    frame = draw_counting_line(frame, self.line_counter)
-                    frame = draw_info(frame, self.line_counter.get_counts())
-                
-                # Display with better scaling
-                cv2image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(cv2image)
-                
-                # Scale image to fit label while maintaining aspect ratio
-                label_width = self.video_label.winfo_width()
-                label_height = self.video_label.winfo_height()
-                
-                if label_width > 1 and label_height > 1:
-                    img.thumbnail((label_width, label_height), Image.Resampling.LANCZOS)
-                
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.video_label.imgtk = imgtk
-                self.video_label.configure(image=imgtk)
+    def update_video(self):
+        if not self.app_running:
+            return
+            
+        # Only the newest processed frame is shown; older ones were already released
+        result = self.pipeline.get_latest() if self.running else None
+        if result is not None:
+            if result.counts != self.last_counts:
+                self.last_counts = result.counts
+                self.stats_panel.update_chart(result.counts)
+            
+            if result.display is not None:
+                # Already resized and converted to RGB by the pipeline
+                self.renderer.render(result.display, rgb=True)
+            else:
+                self.renderer.render(result.frame)
+            # The renderer copied the frame, so the capture buffer can be reused
+            result.release()
         
         if self.app_running:
-            self.after_id = self.root.after(config.GUI_REFRESH_INTERVAL, self.update_gui)
+            self.video_after_id = self.root.after(self.renderer.interval_ms(), self.update_video)
 
     def on_close(self):
         self.app_running = False
@@ -418,6 +321,15 @@ class App:
             except:
                 pass
             self.after_id = None
+        if self.video_after_id:
+            try:
+                self.root.after_cancel(self.video_after_id)
+            except:
+                pass
+            self.video_after_id = None
+        
+        self.pipeline.stop()
+        self.video.stop()
             
         self.stop_conveyor_belt()
         if self.serial:
@@ -0,0 +1,78 @@
+from PIL import Image, ImageTk
+import cv2
+import numpy as np
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+class VideoRenderer:
+    """
+    Shows pipeline frames in a label with as little work per frame as possible:
+    - the fitted size is recomputed only when the label or frame size changes
+    - one cv2.resize (INTER_AREA) into a preallocated buffer, then the BGR->RGB
+      conversion on the small image
+    - one PhotoImage per size, updated in place with paste()
+    Like the previous thumbnail() path, frames are never scaled up.
+    """
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.key = None # (label w, label h, frame w, frame h) of the cached size
+        self.size = None # (w, h) shown
+        self.scratch = None # resized BGR
+        self.buffer = None # RGB shown (backs the PIL image)
+
+        # Stats
+        self.frames_rendered = 0
+
+    def target_size(self, frame_shape):
+        h, w = frame_shape[:2]
+        label_w, label_h = self.label.winfo_width(), self.label.winfo_height()
+        key = (label_w, label_h, w, h)
+        if key != self.key:
+            self.key = key
+            scale = 1.0
+            if label_w > 1 and label_h > 1:
+                scale = min(label_w / w, label_h / h, 1.0)
+            self.size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        return self.size
+
+    def render(self, image, rgb=False):
+        """
+        Show a frame (BGR, or RGB with rgb=True). The frame is copied into the
+        renderer's own buffer, so it may be released right after this call.
+        """
+        w, h = self.target_size(image.shape)
+        if self.buffer is None or self.buffer.shape[:2] != (h, w):
+            self.buffer = np.empty((h, w, 3), dtype=np.uint8)
+            self.scratch = np.empty((h, w, 3), dtype=np.uint8)
+            self.photo = None
+
+        resized = image
+        if image.shape[:2] != (h, w):
+            resized = cv2.resize(image, (w, h), dst=self.buffer if rgb else self.scratch,
+                                 interpolation=cv2.INTER_AREA)
+        if rgb:
+            if resized is not self.buffer:
+                np.copyto(self.buffer, resized)
+        else:
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=self.buffer)
+
+        img = Image.frombuffer("RGB", (w, h), self.buffer, "raw", "RGB", 0, 1)
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.label.imgtk = self.photo
+            self.label.configure(image=self.photo)
+        else:
+            self.photo.paste(img)
+        self.frames_rendered += 1
+
+    @staticmethod
+    def interval_ms():
+        """
+        Delay between display refreshes for DISPLAY_MAX_FPS.
+        """
+        return max(1, int(1000 / max(1, config.DISPLAY_MAX_FPS)))
@@ -8,6 +8,10 @@ class SerialCommunicator:
         self.baud_rate = baud_rate
         self.ser = None
         self.connected = False
+        # Optional callback(message) for every message sent (e.g. session recording)
+        self.on_send = None
+        # Commands come from the GUI thread, verdicts from the pipeline's actuation thread
+        self.write_lock = threading.Lock()
         
         self.connect()
 
@@ -25,10 +29,13 @@ class SerialCommunicator:
         """
         Send a text command like 'start' or 'stop'.
         """
+        if self.on_send:
+            self.on_send(command)
         if self.connected and self.ser:
             try:
                 msg = f"{command}\n".encode('utf-8')
-                self.ser.write(msg)
+                with self.write_lock:
+                    self.ser.write(msg)
                 print(f"Serial Sent: {command}")
             except Exception as e:
                 print(f"Serial Error sending {command}: {e}")
@@ -38,11 +45,14 @@ class SerialCommunicator:
         """
         Send a classification value ('R' or 'F').
         """
+        if self.on_send:
+            self.on_send(value)
         if self.connected and self.ser:
             try:
                 # Send the string value directly with newline
                 val_to_send = f"{value}\n".encode('utf-8')
-                self.ser.write(val_to_send)
+                with self.write_lock:
+                    self.ser.write(val_to_send)
                 print(f"Serial Sent Value: {value}\\n")
             except Exception as e:
                 print(f"Serial Error sending value {value}: {e}")
@@ -1,15 +1,16 @@
-import customtkinter as ctk
+import argparse
 import sys
 import os
 
 # Ensure project root is in path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from gui.app import App
 from config import config
 
-def main():
-    print("Initializing Orange Detection System...")
+def run_gui():
+    # Imported here so headless runs never load Tk or matplotlib
+    import customtkinter as ctk
+    from gui.app import App
     
     # Initialize GUI
     root = ctk.CTk()
@@ -19,5 +20,36 @@ def main():
     print("Starting GUI...")
     root.mainloop()
 
+def run_headless(args):
+    from processing.headless import HeadlessRunner
+    
+    runner = HeadlessRunner(stats_interval=args.stats_interval, stats_csv=args.stats_csv,
+                            source=args.source, offline=args.offline or None,
+                            record=args.record or None)
+    runner.run()
+
+def main():
+    parser = argparse.ArgumentParser(description=config.WINDOW_TITLE)
+    parser.add_argument("--headless", action="store_true",
+                        help="Run the pipeline without the GUI (production line PCs)")
+    parser.add_argument("--stats-interval", type=float, default=None,
+                        help="Seconds between headless stats reports")
+    parser.add_argument("--stats-csv", default=None,
+                        help="Append headless stats reports to this CSV file")
+    parser.add_argument("--source", default=None,
+                        help="Camera id / stream URL / video file / recorded session folder (default: config.CAMERA_ID)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Headless, video file only: process every frame as fast as possible and exit at the end")
+    parser.add_argument("--record", action="store_true",
+                        help="Headless: record camera frames and serial messages for replay (see RECORD_DIR)")
+    args = parser.parse_args()
+    
+    print("Initializing Orange Detection System...")
+    
+    if args.headless:
+        run_headless(args)
+    else:
+        run_gui()
+
 if __name__ == "__main__":
     main()
@@ -1,3 +1,4 @@
+import numpy as np
 import sys
 import os
 
@@ -76,6 +77,46 @@ class LineCounter:
             
         return False
 
+    def check_crossings(self, track_ids, centroids, prev_centroids, valid=None):
+        """
+        Vectorized check_crossing for all tracks of a frame.
+        track_ids: (N,) ints, centroids / prev_centroids: (N, 2) arrays,
+        valid: optional (N,) bool mask (False where there is no previous centroid).
+        Returns a (N,) bool mask of tracks that crossed now (and marks them counted).
+        """
+        track_ids = np.asarray(track_ids)
+        if len(track_ids) == 0:
+            return np.zeros((0,), dtype=bool)
+        cur = np.asarray(centroids, dtype=float)
+        prev = np.asarray(prev_centroids, dtype=float)
+
+        axis = 1 if self.orientation == "horizontal" else 0
+        c, p = cur[:, axis], prev[:, axis]
+        if self.direction in ("down", "right"):
+            crossed = (p <= self.line_pos) & (c > self.line_pos)
+        elif self.direction in ("up", "left"):
+            crossed = (p >= self.line_pos) & (c < self.line_pos)
+        else:
+            crossed = np.zeros(len(track_ids), dtype=bool)
+
+        if valid is not None:
+            crossed &= np.asarray(valid, dtype=bool)
+
+        for i in np.nonzero(crossed)[0]:
+            tid = int(track_ids[i])
+            if tid in self.counted_ids:
+                crossed[i] = False
+            else:
+                self.counted_ids.add(tid)
+        return crossed
+
+    def forget(self, track_ids):
+        """
+        Drop expired track ids so counted_ids stays bounded.
+        """
+        for tid in track_ids:
+            self.counted_ids.discard(int(tid))
+
     def increment(self, label):
         """
         Increment counter based on label.
@@ -98,3 +139,126 @@ class LineCounter:
             self.line_pos = int(self.height * self.position_ratio)
         else:
             self.line_pos = int(self.width * self.position_ratio)
+
+
+# Unit vectors for the configured movement directions
+DIRECTIONS = {
+    "right": (1.0, 0.0),
+    "left": (-1.0, 0.0),
+    "down": (0.0, 1.0),
+    "up": (0.0, -1.0),
+}
+
+class CountingZone:
+    """
+    A counting line (any segment) or polygon zone with its own counts.
+    Lines count tracks whose movement crosses the segment (optionally only in one
+    direction); polygons count tracks entering the zone.
+    """
+    def __init__(self, name, kind, points, direction=None):
+        self.name = name
+        self.kind = kind # 'line' or 'polygon'
+        self.points = np.asarray(points, dtype=float) # pixel coordinates
+        self.direction = np.asarray(DIRECTIONS[direction]) if direction else None
+        self.counted_ids = set()
+        self.counts = {"fresh": 0, "rotten": 0, "non_orange": 0, "total": 0}
+
+    def hits(self, cur, prev):
+        """
+        (N,) bool mask of tracks that crossed the line / entered the zone.
+        """
+        if self.kind == "line":
+            return self.segment_hits(cur, prev)
+        return self.inside(cur) & ~self.inside(prev)
+
+    def segment_hits(self, cur, prev):
+        a, b = self.points[0], self.points[1]
+        ab = b - a
+
+        def cross(u, v):
+            return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+        move = cur - prev
+        d1 = cross(ab, prev - a)
+        d2 = cross(ab, cur - a)
+        d3 = cross(move, a - prev)
+        d4 = cross(move, b - prev)
+        # Current point strictly on the other side, movement spans the segment
+        hit = (d1 * d2 <= 0) & (d2 != 0) & (d3 * d4 <= 0)
+        if self.direction is not None:
+            hit &= move @ self.direction > 0
+        return hit
+
+    def inside(self, pts):
+        """
+        Vectorized ray-casting point-in-polygon test.
+        """
+        x, y = pts[:, 0], pts[:, 1]
+        inside = np.zeros(len(pts), dtype=bool)
+        poly = self.points
+        for i in range(len(poly)):
+            x1, y1 = poly[i]
+            x2, y2 = poly[(i + 1) % len(poly)]
+            spans = (y1 > y) != (y2 > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= spans & (x < x_cross)
+        return inside
+
+class CountingEngine:
+    """
+    Evaluates all tracks of a frame against several lines / polygon zones at once
+    (e.g. one per lane), keeping per-zone counts.
+    """
+    def __init__(self, zones=None):
+        self.zones = list(zones) if zones else []
+
+    @classmethod
+    def from_config(cls, width, height, zone_specs=None):
+        """
+        Build zones from config.COUNT_ZONES (points given as frame fractions).
+        """
+        zone_specs = zone_specs if zone_specs is not None else config.COUNT_ZONES
+        zones = []
+        for spec in zone_specs:
+            points = [(x * width, y * height) for x, y in spec["points"]]
+            zones.append(CountingZone(spec["name"], spec.get("type", "line"), points, spec.get("direction")))
+        return cls(zones)
+
+    def update(self, track_ids, centroids, prev_centroids, labels, valid=None):
+        """
+        track_ids: (N,), centroids / prev_centroids: (N, 2), labels: N count labels,
+        valid: optional (N,) mask of tracks that have a previous centroid.
+        Returns {zone name: [track ids counted this frame]}.
+        """
+        events = {}
+        if not self.zones or len(track_ids) == 0:
+            return events
+        cur = np.asarray(centroids, dtype=float)
+        prev = np.asarray(prev_centroids, dtype=float)
+
+        for zone in self.zones:
+            hit = zone.hits(cur, prev)
+            if valid is not None:
+                hit &= np.asarray(valid, dtype=bool)
+            counted = []
+            for i in np.nonzero(hit)[0]:
+                tid = int(track_ids[i])
+                if tid in zone.counted_ids:
+                    continue
+                zone.counted_ids.add(tid)
+                label = labels[i] if labels[i] in zone.counts else "non_orange"
+                zone.counts[label] += 1
+                zone.counts["total"] += 1
+                counted.append(tid)
+            if counted:
+                events[zone.name] = counted
+        return events
+
+    def forget(self, track_ids):
+        for zone in self.zones:
+            for tid in track_ids:
+                zone.counted_ids.discard(int(tid))
+
+    def get_counts(self):
+        return {zone.name: dict(zone.counts) for zone in self.zones}
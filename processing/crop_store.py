@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import sys
+import os
+from collections import deque
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+class CropStore:
+    """
+    Preallocated crop ring shared by all tracks.
+    Every crop is resized into a fixed-size slot of one array, so stored crops never
+    keep a full camera frame alive and total memory is fixed up front.
+    - Per track: at most max_per_track slots; the track's oldest crop is overwritten.
+    - Globally: when no slot is free, the oldest crop of the track holding the most
+      slots is evicted.
+    """
+    def __init__(self, crop_size=None, max_mb=None, max_per_track=None):
+        self.crop_w, self.crop_h = crop_size if crop_size else config.CROP_STORE_SIZE
+        max_mb = max_mb if max_mb else config.CROP_STORE_MAX_MB
+        self.max_per_track = max_per_track if max_per_track else config.MAX_BUFFER_SIZE
+
+        self.slot_bytes = self.crop_w * self.crop_h * 3
+        self.capacity = max(1, int(max_mb * 1024 * 1024) // self.slot_bytes)
+        self.slab = np.empty((self.capacity, self.crop_h, self.crop_w, 3), dtype=np.uint8)
+
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.slots = {} # track_id -> deque of slot indices (oldest first)
+        self.evictions = 0
+
+    def put(self, track_id, crop):
+        slots = self.slots.get(track_id)
+        if slots is None:
+            slots = self.slots[track_id] = deque()
+
+        if len(slots) >= self.max_per_track:
+            slot = slots.popleft()
+        elif self.free:
+            slot = self.free.pop()
+        else:
+            slot = self.evict()
+
+        cv2.resize(crop, (self.crop_w, self.crop_h), dst=self.slab[slot], interpolation=cv2.INTER_AREA)
+        slots.append(slot)
+
+    def evict(self):
+        """
+        Take the oldest slot of the track with the most stored crops.
+        """
+        victim = max(self.slots, key=lambda tid: len(self.slots[tid]))
+        self.evictions += 1
+        return self.slots[victim].popleft()
+
+    def get(self, track_id):
+        """
+        Stored crops of a track, oldest first (views into the slab; copy to keep them).
+        """
+        return [self.slab[slot] for slot in self.slots.get(track_id, ())]
+
+    def count(self, track_id):
+        return len(self.slots.get(track_id, ()))
+
+    def release(self, track_id):
+        slots = self.slots.pop(track_id, None)
+        if slots:
+            self.free.extend(slots)
+
+    def memory_bytes(self):
+        """
+        Total preallocated bytes.
+        """
+        return self.slab.nbytes
+
+    def used_bytes(self):
+        return (self.capacity - len(self.free)) * self.slot_bytes
@@ -0,0 +1,109 @@
+import csv
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from utils.video import VideoInput
+from processing.pipeline import Pipeline
+from hardware.serial_comm import SerialCommunicator
+
+class HeadlessRunner:
+    """
+    Runs the same Pipeline as the GUI without Tk, PIL or matplotlib.
+    Prints (and optionally appends to CSV) throughput and counts periodically.
+    With an offline video source it stops by itself at the end of the file.
+    """
+    def __init__(self, stats_interval=None, stats_csv=None, source=None, offline=None, record=None):
+        self.stats_interval = stats_interval if stats_interval else config.HEADLESS_STATS_INTERVAL
+        self.stats_csv = stats_csv if stats_csv is not None else config.HEADLESS_STATS_CSV
+        self.csv_fields = None # columns of this run, fixed by the first report
+        self.csv_path = None
+
+        source = source if source is not None else config.CAMERA_ID
+        self.video = VideoInput(source=source, width=config.FRAME_WIDTH,
+                                height=config.FRAME_HEIGHT, fps=config.FPS, offline=offline,
+                                display=False, record=record)
+        self.serial = SerialCommunicator(port=config.SERIAL_PORT, baud_rate=config.BAUD_RATE)
+        if self.video.recorder:
+            self.serial.on_send = self.video.recorder.record_event
+
+        # No display, so skip drawing overlays on every frame
+        self.pipeline = Pipeline(self.video, serial=self.serial, annotate=False)
+
+    def run(self):
+        self.video.start()
+        self.pipeline.start()
+        print("Headless pipeline started (Ctrl+C to stop)")
+        if self.video.offline:
+            print(f"Offline mode: processing every frame of {self.video.source}")
+        start = time.monotonic()
+
+        next_report = time.monotonic() + self.stats_interval
+        try:
+            while True:
+                time.sleep(0.1)
+
+                # Nobody renders frames; give their buffers back to the pool
+                result = self.pipeline.get_latest()
+                if result is not None:
+                    result.release()
+                self.pipeline.get_logs()
+
+                if time.monotonic() >= next_report:
+                    next_report += self.stats_interval
+                    self.report(self.pipeline.get_stats())
+
+                if self.pipeline.finished.is_set():
+                    elapsed = time.monotonic() - start
+                    frames = self.pipeline.frames_processed
+                    print(f"Finished {frames} frames in {elapsed:.1f}s "
+                          f"({frames / elapsed if elapsed > 0 else 0.0:.1f} fps)")
+                    break
+        except KeyboardInterrupt:
+            print("Stopping headless pipeline...")
+        finally:
+            self.pipeline.stop()
+            self.video.stop()
+            self.serial.close()
+            self.report(self.pipeline.get_stats())
+
+    def report(self, stats):
+        print(f"[stats] frames={stats['frames']} fps={stats['fps']:.1f} latency={stats['latency_ms']:.0f}ms "
+              f"tracks={stats['active_tracks']} total={stats['total']} "
+              f"fresh={stats['fresh']} rotten={stats['rotten']} non_orange={stats['non_orange']}")
+
+        if self.stats_csv:
+            row = {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
+            row.update(stats)
+            if self.csv_fields is None:
+                self.open_csv(list(row.keys()))
+            with open(self.csv_path, "a", newline="") as f:
+                # Columns are fixed for the run; keys added later are left out
+                writer = csv.DictWriter(f, fieldnames=self.csv_fields, extrasaction="ignore")
+                writer.writerow(row)
+
+    def open_csv(self, fields):
+        """
+        Fix the CSV columns for this run. An existing file is appended to only if
+        its header matches; otherwise a new timestamped file is started next to it.
+        """
+        self.csv_fields = fields
+        self.csv_path = self.stats_csv
+        folder = os.path.dirname(self.stats_csv)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        if os.path.exists(self.csv_path):
+            with open(self.csv_path, newline="") as f:
+                header = next(csv.reader(f), None)
+            if header == fields:
+                return
+            stem, ext = os.path.splitext(self.stats_csv)
+            self.csv_path = f"{stem}_{time.strftime('%Y%m%d_%H%M%S')}{ext}"
+            print(f"{self.stats_csv} has different columns; writing stats to {self.csv_path}")
+
+        with open(self.csv_path, "w", newline="") as f:
+            csv.DictWriter(f, fieldnames=fields).writeheader()
@@ -0,0 +1,187 @@
+import argparse
+import json
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from processing.counting import LineCounter
+
+# Append-only event journal: one JSON object per line in <dir>/events_<YYYYmmdd>.jsonl.
+# Events:
+#   {"ts", "event": "count", "track_id", "label"}               line crossing (counter increment)
+#   {"ts", "event": "verdict", "track_id", "od_class", "frames",
+#    "fresh_frames", "rotten_frames", "verdict", "serial", "trigger"}   verdict sent to the hardware
+
+class EventJournal:
+    """
+    Buffers events in memory and appends them to the journal from a background
+    thread every flush_interval seconds (one write + fsync per batch), so the
+    pipeline threads never wait on disk I/O.
+    """
+    def __init__(self, journal_dir=None, flush_interval=None, fsync=None):
+        self.journal_dir = journal_dir if journal_dir else config.JOURNAL_DIR
+        self.flush_interval = flush_interval if flush_interval else config.JOURNAL_FLUSH_INTERVAL
+        self.fsync = fsync if fsync is not None else config.JOURNAL_FSYNC
+
+        self.lock = threading.Lock()
+        self.pending = [] # (day, json line)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.file = None
+        self.file_day = None
+
+        # Stats
+        self.events_written = 0
+        self.batches_written = 0
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return self
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="event-journal", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def record(self, event, **fields):
+        """
+        Queue one event (cheap; safe to call from any thread).
+        """
+        ts = time.time()
+        entry = {"ts": round(ts, 3), "event": event}
+        entry.update(fields)
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            self.pending.append((time.strftime("%Y%m%d", time.localtime(ts)), line))
+
+    def run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch = self.pending
+            self.pending = []
+        if not batch:
+            return
+
+        try:
+            # Group by day so a batch spanning midnight goes to both files
+            start = 0
+            for i in range(1, len(batch) + 1):
+                if i == len(batch) or batch[i][0] != batch[start][0]:
+                    self.write(batch[start][0], [line for _, line in batch[start:i]])
+                    start = i
+            self.events_written += len(batch)
+            self.batches_written += 1
+        except OSError as e:
+            print(f"Event journal write failed: {e}")
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def write(self, day, lines):
+        if self.file is None or day != self.file_day:
+            if self.file:
+                self.file.close()
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self.file = open(os.path.join(self.journal_dir, f"events_{day}.jsonl"), "a")
+            self.file_day = day
+        self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+def read_events(journal_dir, since=None, until=None, event=None):
+    """
+    Yield journal events in write order, optionally filtered by unix time and type.
+    A truncated last line (crash while writing) is skipped.
+    """
+    if not os.path.isdir(journal_dir):
+        return
+    for name in sorted(f for f in os.listdir(journal_dir) if f.startswith("events_") and f.endswith(".jsonl")):
+        with open(os.path.join(journal_dir, name)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and entry["ts"] < since:
+                    continue
+                if until is not None and entry["ts"] >= until:
+                    continue
+                if event is not None and entry["event"] != event:
+                    continue
+                yield entry
+
+def replay_counts(journal_dir, since=None, until=None):
+    """
+    Rebuild the LineCounter counts from the journal's count events.
+    """
+    counter = LineCounter(width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT)
+    for entry in read_events(journal_dir, since, until, event="count"):
+        counter.increment(entry["label"])
+    return counter.get_counts()
+
+def hourly_stats(journal_dir, since=None, until=None):
+    """
+    Per-hour counts and verdicts: {"YYYY-mm-dd HH:00": {...}}.
+    """
+    hours = {}
+    for entry in read_events(journal_dir, since, until):
+        hour = time.strftime("%Y-%m-%d %H:00", time.localtime(entry["ts"]))
+        stats = hours.get(hour)
+        if stats is None:
+            stats = hours[hour] = {"total": 0, "fresh": 0, "rotten": 0, "non_orange": 0,
+                                   "sent_F": 0, "sent_R": 0}
+        if entry["event"] == "count":
+            stats["total"] += 1
+            stats[entry["label"]] = stats.get(entry["label"], 0) + 1
+        elif entry["event"] == "verdict":
+            key = f"sent_{entry['serial']}"
+            stats[key] = stats.get(key, 0) + 1
+    return hours
+
+def parse_time(value):
+    if value is None:
+        return None
+    return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or replay the verdict event journal")
+    parser.add_argument("command", choices=["counts", "hourly", "track"])
+    parser.add_argument("--dir", default=config.JOURNAL_DIR, help="Journal directory")
+    parser.add_argument("--since", help="Start time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--until", help="End time, 'YYYY-mm-dd HH:MM'")
+    parser.add_argument("--track-id", type=int, help="Track id for 'track'")
+    args = parser.parse_args()
+
+    since, until = parse_time(args.since), parse_time(args.until)
+    if args.command == "counts":
+        for label, count in replay_counts(args.dir, since, until).items():
+            print(f"{label:<12}{count}")
+    elif args.command == "hourly":
+        columns = ["total", "fresh", "rotten", "non_orange", "sent_F", "sent_R"]
+        print(f"{'hour':<18}" + "".join(f"{c:>12}" for c in columns))
+        for hour, stats in sorted(hourly_stats(args.dir, since, until).items()):
+            print(f"{hour:<18}" + "".join(f"{stats.get(c, 0):>12}" for c in columns))
+    else:
+        for entry in read_events(args.dir, since, until):
+            if args.track_id is None or entry["track_id"] == args.track_id:
+                print(json.dumps(entry))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from detector.tracker import roi_to_pixels
+
+class MotionGate:
+    """
+    Cheap occupancy check run before detection.
+    Differences a downscaled, blurred grayscale copy of the belt ROI against the
+    previous frame. Detection is skipped while nothing moves; after the last motion
+    the gate stays open for MOTION_HOLD_TIME so tracks settle before idling.
+    """
+    def __init__(self, roi=None, width=None, pixel_threshold=None, min_fraction=None, hold_time=None):
+        self.roi = roi if roi is not None else config.BELT_ROI
+        self.width = width if width else config.MOTION_GATE_WIDTH
+        self.pixel_threshold = pixel_threshold if pixel_threshold is not None else config.MOTION_PIXEL_THRESHOLD
+        self.min_fraction = min_fraction if min_fraction is not None else config.MOTION_MIN_FRACTION
+        self.hold_time = hold_time if hold_time is not None else config.MOTION_HOLD_TIME
+
+        self.prev = None
+        self.last_motion = None
+        self.motion_fraction = 0.0
+
+        # Stats
+        self.skipped_frames = 0
+        self.active_frames = 0
+
+    def is_active(self, frame, now=None):
+        """
+        Returns True if detection should run on this frame.
+        """
+        now = now if now is not None else time.monotonic()
+
+        roi = roi_to_pixels(self.roi, frame.shape)
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            frame = frame[y1:y2, x1:x2]
+
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self.prev is None or self.prev.shape != gray.shape:
+            self.prev = gray
+            self.last_motion = now
+            self.active_frames += 1
+            return True
+
+        diff = cv2.absdiff(gray, self.prev)
+        self.prev = gray
+        self.motion_fraction = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+        if self.motion_fraction >= self.min_fraction:
+            self.last_motion = now
+
+        active = now - self.last_motion <= self.hold_time
+        if active:
+            self.active_frames += 1
+        else:
+            self.skipped_frames += 1
+        return active
@@ -1,20 +1,29 @@
 import time
 import sys
 import os
-from collections import deque
+from collections import OrderedDict
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
+from processing.crop_store import CropStore
 
 class TrackBuffer:
     """
     Stores data for a single tracked object.
+    Fields are declared in __slots__ to keep thousands of tracks compact.
     """
-    def __init__(self, track_id, max_size=100):
+    __slots__ = (
+        "track_id", "store", "last_seen", "finalized",
+        "classification_result", "is_rotten",
+        "od_class_name", "total_frames", "fresh_frames_count", "rotten_frames_count",
+        "consecutive_fresh", "decision_latched", "last_centroid", "verdict_sent",
+    )
+
+    def __init__(self, track_id, store, now=None):
         self.track_id = track_id
-        self.crops = deque(maxlen=max_size)
-        self.last_seen = time.time()
+        self.store = store # CropStore holding this track's crops
+        self.last_seen = now if now is not None else time.monotonic()
         self.finalized = False
         self.classification_result = None # 1 (rotten) or 0 (fresh)
         self.is_rotten = False # Flag if ANY rotten frame is seen
@@ -24,23 +33,58 @@ class TrackBuffer:
         self.total_frames = 0
         self.fresh_frames_count = 0
         self.rotten_frames_count = 0
+        
+        # Sampling policy state
+        self.consecutive_fresh = 0
+        self.decision_latched = False # No more classification needed
+        
+        # Centroid in the previous frame (for line crossing)
+        self.last_centroid = None
+        
+        # Set once the F/R verdict has been queued for the hardware
+        self.verdict_sent = False
 
-    def add_crop(self, crop):
-        self.crops.append(crop)
-        self.last_seen = time.time()
+    @property
+    def crops(self):
+        return self.store.get(self.track_id)
+
+    def add_crop(self, crop, now=None):
+        # Copied (resized) into the store, so the frame is not kept alive
+        self.store.put(self.track_id, crop)
+        self.last_seen = now if now is not None else time.monotonic()
         self.total_frames += 1
 
-    def update_classification(self, label_id):
+    def should_classify(self):
+        """
+        Sampling policy: classify every CLASSIFY_EVERY_N-th crop until the decision is latched.
+        """
+        if self.decision_latched:
+            return False
+        every_n = max(1, config.CLASSIFY_EVERY_N)
+        return (self.total_frames - 1) % every_n == 0
+
+    def update_classification(self, label_id, conf=None):
         """
         Update the running classification status.
         Decision rule: If ANY crop is rotten (1), the object is rotten.
+        The decision is latched (no further sampling) once rotten is seen, or after
+        CLASSIFY_FRESH_VOTES consecutive fresh votes with conf >= CLASSIFY_FRESH_CONF.
         """
         # Assuming 0 is fresh, 1 is rotten (updated config)
         if label_id == 1:
             self.is_rotten = True
             self.rotten_frames_count += 1
+            self.consecutive_fresh = 0
+            if config.CLASSIFY_STOP_ON_ROTTEN:
+                self.decision_latched = True
         else:
             self.fresh_frames_count += 1
+            if conf is not None and conf >= config.CLASSIFY_FRESH_CONF:
+                self.consecutive_fresh += 1
+            else:
+                self.consecutive_fresh = 0
+            if config.CLASSIFY_FRESH_VOTES and self.consecutive_fresh >= config.CLASSIFY_FRESH_VOTES:
+                self.decision_latched = True
         
         # Current status
         self.classification_result = 1 if self.is_rotten else 0
@@ -48,39 +92,60 @@ class TrackBuffer:
 class ObjectAggregator:
     """
     Manages TrackBuffers for all active objects.
+    Buffers are kept ordered by last_seen (oldest first), so cleanup only
+    touches tracks that have actually expired.
     """
-    def __init__(self):
-        self.buffers = {} # track_id -> TrackBuffer
+    def __init__(self, store=None):
+        self.buffers = OrderedDict() # track_id -> TrackBuffer, least recently seen first
+        self.store = store if store else CropStore()
 
-    def update(self, track_id, crop):
+    def update(self, track_id, crop, now=None):
         """
         Add a new crop for a track ID.
+        now: frame time (defaults to time.monotonic()).
         """
-        if track_id not in self.buffers:
-            self.buffers[track_id] = TrackBuffer(track_id, max_size=config.MAX_BUFFER_SIZE)
+        buf = self.buffers.get(track_id)
+        if buf is None:
+            buf = self.buffers[track_id] = TrackBuffer(track_id, self.store, now)
+        else:
+            self.buffers.move_to_end(track_id)
         
-        self.buffers[track_id].add_crop(crop)
-        return self.buffers[track_id]
+        buf.add_crop(crop, now)
+        return buf
+
+    def touch(self, track_ids, now=None):
+        """
+        Mark tracks as still present without adding a crop
+        (used while detection is idled by the motion gate).
+        """
+        now = now if now is not None else time.monotonic()
+        for track_id in track_ids:
+            buf = self.buffers.get(track_id)
+            if buf is not None:
+                buf.last_seen = now
+                self.buffers.move_to_end(track_id)
 
     def get_buffer(self, track_id):
         return self.buffers.get(track_id)
 
-    def cleanup(self, timeout=None):
+    def cleanup(self, timeout=None, now=None):
         """
         Remove tracks that haven't been seen for 'timeout' seconds.
         Returns a list of removed TrackBuffers (so we can finalize them if needed).
+        Their crops are released back to the store.
         """
         timeout = timeout if timeout is not None else config.TRACK_TIMEOUT
-        now = time.time()
-        to_remove = []
-        
-        for tid, buf in self.buffers.items():
-            if now - buf.last_seen > timeout:
-                to_remove.append(tid)
-        
+        now = now if now is not None else time.monotonic()
         removed_buffers = []
-        for tid in to_remove:
-            removed_buffers.append(self.buffers.pop(tid))
+        
+        # Oldest first: stop at the first track that is still alive
+        while self.buffers:
+            tid, buf = next(iter(self.buffers.items()))
+            if now - buf.last_seen <= timeout:
+                break
+            self.buffers.popitem(last=False)
+            self.store.release(tid)
+            removed_buffers.append(buf)
             
         return removed_buffers
 
@@ -0,0 +1,592 @@
+import cv2
+import numpy as np
+import queue
+import threading
+import traceback
+from concurrent.futures import wait
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from detector.tracker import ObjectTracker, roi_to_pixels
+from detector.keyframe import KeyframeTracker
+from detector.classifier import ObjectClassifier
+from detector.batcher import ClassificationBatcher
+from detector.registry import registry
+from processing.object_buffer import ObjectAggregator
+from processing.counting import LineCounter, CountingEngine
+from processing.motion_gate import MotionGate
+from processing.journal import EventJournal
+from utils.storage import CropWriter
+from utils.retention import RetentionManager
+from utils.drawing import draw_boxes, draw_counting_line, draw_info, draw_roi, draw_zones
+
+# Passed down the stage queues after the last frame of an offline source
+END_OF_STREAM = "end_of_stream"
+
+
+class PipelineResult:
+    """
+    Snapshot of one processed frame, published for the display.
+    Holds the pooled capture buffer: call release() once the frame is displayed.
+    """
+    def __init__(self, frame, counts, fps, zone_counts=None):
+        self.lease = frame # utils.video.Frame
+        self.frame = frame.image
+        # Annotated display-size RGB image when preprocessing runs in the capture thread
+        self.display = frame.display
+        self.seq = frame.seq
+        self.timestamp = frame.timestamp # capture time (time.monotonic)
+        self.counts = counts
+        self.fps = fps
+        self.zone_counts = zone_counts if zone_counts else {}
+
+    def release(self):
+        self.lease.release()
+
+
+class Verdict:
+    """
+    Final decision for one tracked object, handed to the actuation stage.
+    Track stats are copied because the track may still be updated after an early verdict.
+    trigger: 'exit', 'crossing' or 'confident'
+    """
+    def __init__(self, buf, serial_val, log_label, trigger):
+        self.track_id = buf.track_id
+        self.od_class_name = buf.od_class_name
+        self.total_frames = buf.total_frames
+        self.fresh_frames_count = buf.fresh_frames_count
+        self.rotten_frames_count = buf.rotten_frames_count
+        self.serial_val = serial_val
+        self.log_label = log_label
+        self.trigger = trigger
+
+
+class Pipeline:
+    """
+    Runs capture -> detect/track -> classify -> decide -> actuate in worker threads.
+    Stages are connected by bounded queues so a slow stage applies backpressure
+    instead of piling up frames. Consumers (GUI or headless runner) only read the
+    latest published result and drain the log messages.
+    With an offline video source every frame is processed and decided
+    deterministically (frame times instead of wall-clock time, synchronous
+    classification); finished is set once the last verdict has been sent.
+    """
+    def __init__(self, video, serial=None, annotate=True):
+        self.video = video
+        self.serial = serial
+        self.annotate = annotate
+
+        self.tracker = ObjectTracker()
+        self.keyframes = KeyframeTracker(self.tracker)
+        self.classifier = ObjectClassifier()
+        # Offline runs classify synchronously so results do not depend on timing
+        self.offline = getattr(video, "offline", False)
+        use_batcher = config.CLASSIFIER_MICRO_BATCH and not self.offline
+        self.batcher = ClassificationBatcher(self.classifier) if use_batcher else None
+        self.aggregator = ObjectAggregator()
+        self.line_counter = LineCounter(width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT)
+        # Extra lines / lane zones from config.COUNT_ZONES, with per-zone counts
+        self.zone_counter = CountingEngine.from_config(config.FRAME_WIDTH, config.FRAME_HEIGHT)
+        self.motion_gate = MotionGate() if config.MOTION_GATE_ENABLED else None
+        self.crop_writer = CropWriter()
+        # Deletes old crops/logs (and handles "Clear Logs") off the worker threads
+        self.retention = RetentionManager(on_report=self.log)
+        # Structured per-object events (counts and verdicts) for auditing/replay
+        self.journal = EventJournal() if config.JOURNAL_ENABLED else None
+
+        # Tracks of the last detected frame, reused while the belt is idle
+        self.last_tracks = None
+
+        # Runtime toggles (set from the GUI thread, read by the workers)
+        self.od_enabled = True
+        self.class_enabled = True
+        self.save_crops_enabled = False
+
+        # Bounded queues between stages
+        self.track_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        self.actuate_queue = queue.Queue(maxsize=config.ACTUATE_QUEUE_SIZE)
+        self.log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+
+        # (TrackBuffer, Future) pairs waiting on the micro-batcher
+        self.pending_classifications = []
+        self.classify_errors = 0
+        self.classify_error_types = set() # already logged
+        self.stage_errors = 0 # frames lost to detect/process exceptions
+        self.logged_errors = set() # (stage, exception type) already logged
+
+        # Latest result slot (the display only ever needs the newest frame)
+        self.result_lock = threading.Lock()
+        self.latest_result = None
+
+        self.running = False
+        self.threads = []
+        self.finished = threading.Event() # offline source fully processed
+
+        # Throughput stats
+        self.frames_processed = 0
+        self.fps = 0.0
+        self.last_frame_time = None
+        self.latency_ms = 0.0 # capture -> result published
+        self.frame_age_ms = 0.0 # capture -> picked up by the detect stage
+        self.frames_skipped = 0 # captured but never processed (pipeline too slow)
+        self.last_seq = None
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.crop_writer.start()
+        self.retention.start()
+        if self.journal:
+            self.journal.start()
+        if self.batcher:
+            self.batcher.start()
+        self.threads = [
+            threading.Thread(target=self.detect_loop, name="pipeline-detect", daemon=True),
+            threading.Thread(target=self.process_loop, name="pipeline-process", daemon=True),
+            threading.Thread(target=self.actuate_loop, name="pipeline-actuate", daemon=True),
+        ]
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        for t in self.threads:
+            if t.is_alive():
+                t.join(timeout=2.0)
+        self.threads = []
+        if self.batcher:
+            self.batcher.stop()
+        self.crop_writer.stop()
+        self.retention.stop()
+
+        # Return frames still held by the queue / result slot to the pool
+        while True:
+            try:
+                item = self.track_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not END_OF_STREAM:
+                item[0].release()
+        result = self.get_latest()
+        if result is not None:
+            result.release()
+        if self.journal:
+            self.journal.stop()
+
+    def get_stats(self):
+        """
+        Throughput and count snapshot (safe to call from any thread).
+        """
+        stats = {
+            "frames": self.frames_processed,
+            "fps": round(self.fps, 2),
+            "active_tracks": len(self.aggregator.buffers),
+            "idle_frames": self.motion_gate.skipped_frames if self.motion_gate else 0,
+            "keyframes": self.keyframes.keyframes,
+            "predicted_frames": self.keyframes.predicted_frames,
+            "model_memory_mb": round(registry.total_memory() / 1e6, 1),
+            "crop_store_mb": round(self.aggregator.store.used_bytes() / 1e6, 1),
+            "crop_evictions": self.aggregator.store.evictions,
+            "crops_written": self.crop_writer.written,
+            "crops_dropped": self.crop_writer.dropped,
+            "classify_errors": self.classify_errors,
+            "pipeline_errors": self.stage_errors,
+            "latency_ms": round(self.latency_ms, 1),
+            "frame_age_ms": round(self.frame_age_ms, 1),
+            "frames_skipped": self.frames_skipped,
+            "frame_pool_misses": self.video.pool.misses,
+            "log_disk_mb": round(self.retention.disk_bytes / 1e6, 1),
+            "log_freed_mb": round(self.retention.freed_bytes / 1e6, 1),
+        }
+        stats.update(self.video.get_stats())
+        stats.update(self.line_counter.get_counts())
+        for name, counts in self.zone_counter.get_counts().items():
+            for label, count in counts.items():
+                stats[f"{name}_{label}"] = count
+        return stats
+
+    def log(self, msg):
+        print(msg)
+        try:
+            self.log_queue.put_nowait(msg)
+        except queue.Full:
+            pass
+
+    def get_logs(self):
+        """
+        Drain and return all pending log messages.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def get_latest(self):
+        """
+        Take the newest published result (or None if nothing new since the last call).
+        """
+        with self.result_lock:
+            result = self.latest_result
+            self.latest_result = None
+        return result
+
+    def publish(self, result):
+        with self.result_lock:
+            old = self.latest_result
+            self.latest_result = result
+        # Never displayed: give its buffer back
+        if old is not None:
+            old.release()
+
+    def put(self, q, item):
+        """
+        Blocking put that gives up when the pipeline is stopped.
+        """
+        while self.running:
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q):
+        while self.running:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    # -------------------------------------------------------------------------
+    # Stage 1: detect / track
+    # -------------------------------------------------------------------------
+    def detect_loop(self):
+        while self.running:
+            # Each captured frame is processed at most once (no copy, no duplicates)
+            frame = self.video.read_new(timeout=0.1)
+            if frame is None:
+                if getattr(self.video, "ended", False):
+                    self.put(self.track_queue, END_OF_STREAM)
+                    return
+                continue
+
+            age = (time.monotonic() - frame.timestamp) * 1000.0
+            self.frame_age_ms = 0.9 * self.frame_age_ms + 0.1 * age if self.frame_age_ms else age
+
+            if self.last_seq is not None and frame.seq > self.last_seq + 1:
+                self.frames_skipped += frame.seq - self.last_seq - 1
+            self.last_seq = frame.seq
+
+            try:
+                item = self.detect_frame(frame)
+            except Exception as e:
+                # A model/tracker error loses this frame, not the whole stage
+                frame.release()
+                self.stage_error("detect", e)
+                continue
+
+            if not self.put(self.track_queue, item):
+                frame.release()
+
+    def detect_frame(self, frame):
+        if not self.od_enabled:
+            self.keyframes.force_keyframe()
+            return (frame, None, False)
+        if self.motion_gate and not self.motion_gate.is_active(frame.image, frame.pts):
+            # Skip detection entirely while nothing moves on the belt
+            self.keyframes.force_keyframe()
+            return (frame, None, True)
+        return (frame, self.keyframes.track(frame.image, frame.model_input, frame.letterbox), False)
+
+    def stage_error(self, stage, error):
+        """
+        Count a worker error and log it (with traceback the first time per stage and type).
+        """
+        self.stage_errors += 1
+        key = (stage, type(error))
+        if key not in self.logged_errors:
+            self.logged_errors.add(key)
+            traceback.print_exc()
+            self.log(f"Pipeline {stage} error: {type(error).__name__}: {error}")
+
+    # -------------------------------------------------------------------------
+    # Stage 2: classify / count / decide
+    # -------------------------------------------------------------------------
+    def process_loop(self):
+        while self.running:
+            item = self.get(self.track_queue)
+            if item is None:
+                break
+            if item is END_OF_STREAM:
+                # Decide every object still on the belt, then let actuation finish
+                self.apply_classifications()
+                self.decide(flush=True)
+                self.put(self.actuate_queue, END_OF_STREAM)
+                return
+            lease, tracks, idle = item
+            try:
+                self.process_frame(lease, tracks, idle)
+            except Exception as e:
+                lease.release()
+                self.stage_error("process", e)
+
+    def process_frame(self, lease, tracks, idle):
+        frame = lease.image
+        now = lease.pts
+
+        if idle:
+            # Nothing moved: objects still on the belt stay where they were, so
+            # keep their tracks alive for the whole idle period without
+            # re-detecting them. Expiring them would send a verdict now and a
+            # second one when the (frozen) tracker brings the same ids back.
+            # Objects that already left are not in last_tracks and time out as usual.
+            tracks = self.last_tracks
+            if tracks is not None:
+                self.aggregator.touch(tracks.ids, now)
+            self.apply_classifications()
+            self.decide(now)
+        elif tracks is not None:
+            self.process_tracks(frame, tracks, now)
+            self.decide(now)
+            self.last_tracks = tracks
+        else:
+            self.last_tracks = None
+
+        if self.annotate:
+            self.draw(lease, tracks, tracks is not None or idle)
+
+        self.update_fps()
+        latency = (time.monotonic() - lease.timestamp) * 1000.0
+        self.latency_ms = 0.9 * self.latency_ms + 0.1 * latency if self.latency_ms else latency
+        self.publish(PipelineResult(lease, dict(self.line_counter.get_counts()), self.fps,
+                                    self.zone_counter.get_counts()))
+
+    def draw(self, lease, tracks, overlays):
+        """
+        Draw the overlays on the display image if the capture thread made one
+        (then convert it to RGB for the GUI), otherwise on the full frame.
+        """
+        canvas = lease.display if lease.display is not None else lease.image
+        scale = canvas.shape[1] / lease.image.shape[1]
+
+        if overlays:
+            draw_roi(canvas, roi_to_pixels(self.tracker.roi, lease.image.shape), scale)
+            draw_boxes(canvas, tracks, self.aggregator.buffers, scale)
+            draw_counting_line(canvas, self.line_counter, scale)
+            draw_zones(canvas, self.zone_counter, scale)
+            draw_info(canvas, self.line_counter.get_counts())
+
+        if lease.display is not None:
+            cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB, dst=canvas)
+
+    def process_tracks(self, frame, tracks, now=None):
+        if len(tracks) == 0:
+            self.apply_classifications()
+            return
+
+        names = tracks.names
+        h, w = frame.shape[:2]
+
+        tracked = []
+        to_classify = []
+        
+        for box, track_id, cls in zip(tracks.boxes, tracks.ids, tracks.clss):
+            x1, y1, x2, y2 = box
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+
+            crop = frame[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+
+            is_new = track_id not in self.aggregator.buffers
+            buf = self.aggregator.update(track_id, crop, now)
+
+            if is_new:
+                buf.od_class_name = names[cls]
+
+            if buf.od_class_name != "orange" and config.SAVE_NON_ORANGE:
+                self.save_crop(config.NON_ORANGE_LOG_DIR, buf, crop, (x1, y1, x2, y2))
+
+            if self.save_crops_enabled:
+                self.save_crop(config.CROPS_LOG_DIR, buf, crop, (x1, y1, x2, y2))
+
+            if buf.should_classify():
+                to_classify.append((buf, crop))
+            tracked.append((track_id, buf, ((x1 + x2) // 2, (y1 + y2) // 2)))
+
+            # Non-orange verdicts are known from the first detection
+            if config.DECISION_MODE == "confident" and buf.od_class_name != "orange":
+                self.send_verdict(buf, "confident")
+
+        if to_classify and self.class_enabled and self.classifier.model:
+            if self.batcher:
+                # Crops are copied because the frame gets annotated before the batch runs
+                for buf, crop in to_classify:
+                    self.pending_classifications.append((buf, self.batcher.submit(crop.copy())))
+            else:
+                # One batched inference for all crops of the frame
+                preds = self.classifier.classify_batch([crop for _, crop in to_classify])
+                for (buf, _), (label_id, conf) in zip(to_classify, preds):
+                    buf.update_classification(label_id, conf)
+
+        self.apply_classifications()
+
+        if not tracked:
+            return
+
+        # All tracks of the frame are checked against the line(s) at once
+        ids = np.array([track_id for track_id, _, _ in tracked])
+        centroids = np.array([centroid for _, _, centroid in tracked], dtype=float)
+        valid = np.array([buf.last_centroid is not None for _, buf, _ in tracked])
+        prev = np.array([buf.last_centroid if buf.last_centroid is not None else centroid
+                         for _, buf, centroid in tracked], dtype=float)
+        for _, buf, centroid in tracked:
+            buf.last_centroid = centroid
+
+        crossed = self.line_counter.check_crossings(ids, centroids, prev, valid)
+        self.zone_counter.update(ids, centroids, prev, [self.count_label(buf) for _, buf, _ in tracked], valid)
+
+        for i, (track_id, buf, _) in enumerate(tracked):
+            if crossed[i]:
+                if config.DECISION_MODE != "exit" and not buf.verdict_sent:
+                    # Use every classification already submitted for this object
+                    self.apply_classifications(wait_for=buf)
+                    self.send_verdict(buf, "crossing")
+
+                label = self.count_label(buf)
+                self.line_counter.increment(label)
+                if self.journal:
+                    self.journal.record("count", track_id=int(track_id), label=label)
+
+            elif config.DECISION_MODE == "confident" and buf.decision_latched:
+                self.send_verdict(buf, "confident")
+
+    def count_label(self, buf):
+        if buf.od_class_name == "orange":
+            return "rotten" if buf.classification_result == 1 else "fresh"
+        return "non_orange"
+
+    def apply_classifications(self, wait_for=None):
+        """
+        Apply finished micro-batcher results to their TrackBuffers, in submission order.
+        Runs on the process thread so buffers are never touched concurrently.
+        wait_for: a TrackBuffer whose pending results should be waited for first.
+        """
+        if wait_for is not None:
+            futures = [f for buf, f in self.pending_classifications if buf is wait_for]
+            if futures:
+                wait(futures, timeout=config.VERDICT_WAIT_TIMEOUT)
+
+        still_pending = []
+        for buf, future in self.pending_classifications:
+            if not future.done():
+                still_pending.append((buf, future))
+                continue
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                # The crop gets no vote; log each kind of failure once
+                self.classify_errors += 1
+                if type(error) not in self.classify_error_types:
+                    self.classify_error_types.add(type(error))
+                    self.log(f"Classification failed: {type(error).__name__}: {error}")
+                continue
+            label_id, conf = future.result()
+            buf.update_classification(label_id, conf)
+        self.pending_classifications = still_pending
+
+    def save_crop(self, base_dir, buf, crop, bbox):
+        # Encoding and disk I/O happen on the crop writer thread
+        verdict = buf.classification_result if buf.classification_result is not None else -1
+        self.crop_writer.submit(base_dir, crop, buf.track_id, buf.od_class_name, verdict, bbox)
+
+    def decide(self, now=None, flush=False):
+        """
+        Send verdicts for expired tracks. In 'crossing'/'confident' mode this is only
+        the fallback for objects that never got an earlier verdict.
+        flush: treat every track as expired (end of stream).
+        """
+        removed = self.aggregator.cleanup(timeout=-1 if flush else None, now=now)
+        for buf in removed:
+            self.send_verdict(buf, "exit")
+
+        # Expired ids can never cross again; keep the counted sets bounded
+        if removed:
+            expired = [buf.track_id for buf in removed]
+            self.line_counter.forget(expired)
+            self.zone_counter.forget(expired)
+
+    def send_verdict(self, buf, trigger):
+        """
+        Queue the F/R verdict of a track for actuation, at most once per track.
+        - If not orange -> 'R'
+        - If orange and rotten -> 'R'
+        - If orange and fresh -> 'F'
+        """
+        if buf.verdict_sent:
+            return
+        buf.verdict_sent = True
+
+        if buf.od_class_name == "orange":
+            if not buf.is_rotten:
+                serial_val, log_label = 'F', "Fresh"
+            else:
+                serial_val, log_label = 'R', "Rotten"
+        else:
+            serial_val, log_label = 'R', "Non-orange"
+
+        self.put(self.actuate_queue, Verdict(buf, serial_val, log_label, trigger))
+
+    def update_fps(self):
+        now = time.time()
+        if self.last_frame_time is not None:
+            dt = now - self.last_frame_time
+            if dt > 0:
+                # Exponential moving average to keep the readout stable
+                self.fps = 0.9 * self.fps + 0.1 * (1.0 / dt) if self.fps else 1.0 / dt
+        self.last_frame_time = now
+        self.frames_processed += 1
+
+    # -------------------------------------------------------------------------
+    # Stage 3: actuate
+    # -------------------------------------------------------------------------
+    def actuate_loop(self):
+        while self.running:
+            verdict = self.get(self.actuate_queue)
+            if verdict is None:
+                break
+            if verdict is END_OF_STREAM:
+                self.log("End of stream: all frames processed")
+                self.finished.set()
+                break
+
+            if self.serial:
+                self.serial.send_classification(verdict.serial_val)
+
+            events = {"exit": "exited", "crossing": "crossed the line", "confident": "decided"}
+            self.log("-" * 40)
+            self.log(f"Object {verdict.track_id} {events.get(verdict.trigger, verdict.trigger)}")
+            self.log(f"   Frames seen: {verdict.total_frames}")
+            self.log(f"   Class: {verdict.od_class_name}")
+            self.log(f"   Verdict: {verdict.log_label} -> Sending '{verdict.serial_val}'")
+
+            if self.journal:
+                self.journal.record("verdict", track_id=int(verdict.track_id),
+                                    od_class=verdict.od_class_name,
+                                    frames=verdict.total_frames,
+                                    fresh_frames=verdict.fresh_frames_count,
+                                    rotten_frames=verdict.rotten_frames_count,
+                                    verdict=verdict.log_label.lower().replace("-", "_"),
+                                    serial=verdict.serial_val,
+                                    trigger=verdict.trigger)
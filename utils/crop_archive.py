@@ -0,0 +1,203 @@
+import argparse
+import struct
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+# Append-only crop archive.
+# An archive is a folder of rolling shards. Each shard is a pair of files:
+#   <name>.bin  concatenated JPEG-encoded crops
+#   <name>.idx  fixed-size index records, one per crop (see INDEX_FORMAT)
+# Shards are named by creation time, so sorting them by name gives write order.
+
+# offset, length, timestamp, track_id, x1, y1, x2, y2, verdict, class name
+INDEX_FORMAT = "<QIdq4ib16s"
+INDEX_SIZE = struct.calcsize(INDEX_FORMAT)
+
+VERDICT_NAMES = {-1: "unknown", 0: "fresh", 1: "rotten"}
+
+class CropRecord:
+    """
+    One archived crop (index entry).
+    """
+    __slots__ = ("shard", "offset", "length", "timestamp", "track_id", "bbox", "verdict", "class_name")
+
+    def __init__(self, shard, offset, length, timestamp, track_id, bbox, verdict, class_name):
+        self.shard = shard # path of the .bin file
+        self.offset = offset
+        self.length = length
+        self.timestamp = timestamp # unix time (seconds)
+        self.track_id = track_id
+        self.bbox = bbox # (x1, y1, x2, y2) in frame pixels
+        self.verdict = verdict # -1 unknown, 0 fresh, 1 rotten
+        self.class_name = class_name # OD class name
+
+class CropArchiveWriter:
+    """
+    Appends encoded crops to rolling shards in one archive folder.
+    Not thread-safe: use it from a single writer thread (see utils.storage.CropWriter).
+    """
+    def __init__(self, archive_dir, shard_mb=None):
+        self.archive_dir = archive_dir
+        self.shard_bytes = int((shard_mb if shard_mb else config.CROP_ARCHIVE_SHARD_MB) * 1024 * 1024)
+        self.bin_file = None
+        self.idx_file = None
+        self.bin_path = None
+        self.shard_size = 0
+        self.shard_count = 0
+
+    def open_shard(self):
+        self.close()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        name = f"crops_{time.strftime('%Y%m%d_%H%M%S')}_{self.shard_count:04d}"
+        self.shard_count += 1
+        self.bin_path = os.path.join(self.archive_dir, name + ".bin")
+        self.bin_file = open(self.bin_path, "ab")
+        self.idx_file = open(os.path.join(self.archive_dir, name + ".idx"), "ab")
+        self.shard_size = self.bin_file.tell()
+
+    def append(self, data, track_id, class_name, verdict=-1, bbox=None, timestamp=None):
+        """
+        Append one encoded crop (bytes) with its metadata.
+        """
+        # Roll when full, or if the shard was deleted under us (logs cleared / retention)
+        if (self.bin_file is None or self.shard_size + len(data) > self.shard_bytes
+                or not os.path.exists(self.bin_path)):
+            self.open_shard()
+
+        timestamp = timestamp if timestamp is not None else time.time()
+        x1, y1, x2, y2 = bbox if bbox is not None else (0, 0, 0, 0)
+        offset = self.shard_size
+        self.bin_file.write(data)
+        self.idx_file.write(struct.pack(INDEX_FORMAT, offset, len(data), timestamp, int(track_id),
+                                        int(x1), int(y1), int(x2), int(y2), int(verdict),
+                                        str(class_name).encode("utf-8")[:16]))
+        self.shard_size += len(data)
+
+    def flush(self):
+        if self.bin_file:
+            # Data first, so an index entry never points past the end of the data
+            self.bin_file.flush()
+            self.idx_file.flush()
+
+    def close(self):
+        if self.bin_file:
+            self.flush()
+            self.bin_file.close()
+            self.idx_file.close()
+        self.bin_file = None
+        self.idx_file = None
+
+class CropArchiveReader:
+    """
+    Reads the crops and index of an archive folder.
+    """
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+
+    def shards(self):
+        """
+        Paths of the .bin files, oldest first.
+        """
+        if not os.path.isdir(self.archive_dir):
+            return []
+        names = sorted(f for f in os.listdir(self.archive_dir) if f.endswith(".bin"))
+        return [os.path.join(self.archive_dir, f) for f in names]
+
+    def records(self):
+        """
+        Yield a CropRecord for every complete crop in the archive.
+        """
+        for bin_path in self.shards():
+            idx_path = bin_path[:-4] + ".idx"
+            if not os.path.exists(idx_path):
+                continue
+            data_size = os.path.getsize(bin_path)
+            with open(idx_path, "rb") as f:
+                raw = f.read()
+            # A trailing partial record (crash while writing) is ignored
+            for start in range(0, len(raw) - INDEX_SIZE + 1, INDEX_SIZE):
+                (offset, length, timestamp, track_id, x1, y1, x2, y2, verdict,
+                 name) = struct.unpack_from(INDEX_FORMAT, raw, start)
+                if offset + length > data_size:
+                    break
+                yield CropRecord(bin_path, offset, length, timestamp, track_id, (x1, y1, x2, y2),
+                                 verdict, name.rstrip(b"\0").decode("utf-8", "replace"))
+
+    def read_bytes(self, record):
+        with open(record.shard, "rb") as f:
+            f.seek(record.offset)
+            return f.read(record.length)
+
+    def read_image(self, record):
+        import cv2
+        import numpy as np
+        return cv2.imdecode(np.frombuffer(self.read_bytes(record), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def export(self, out_dir):
+        """
+        Export to the folder layout used by the folder writer:
+        <out_dir>/<class>_<track_id>/<timestamp_ms>.jpg (no re-encoding).
+        Returns the number of crops exported.
+        """
+        count = 0
+        open_shard, f = None, None
+        try:
+            for record in self.records():
+                if record.shard != open_shard:
+                    if f:
+                        f.close()
+                    f = open(record.shard, "rb")
+                    open_shard = record.shard
+                f.seek(record.offset)
+                data = f.read(record.length)
+
+                folder = os.path.join(out_dir, f"{record.class_name}_{record.track_id}")
+                os.makedirs(folder, exist_ok=True)
+                path = os.path.join(folder, f"{int(record.timestamp * 1000)}.jpg")
+                # Same millisecond for the same track: keep both
+                if os.path.exists(path):
+                    path = os.path.join(folder, f"{int(record.timestamp * 1000)}_{count}.jpg")
+                with open(path, "wb") as out:
+                    out.write(data)
+                count += 1
+        finally:
+            if f:
+                f.close()
+        return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a crop archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="Summarize an archive")
+    p_list.add_argument("archive_dir")
+
+    p_export = sub.add_parser("export", help="Export crops to a folder dataset")
+    p_export.add_argument("archive_dir")
+    p_export.add_argument("out_dir")
+    args = parser.parse_args()
+
+    reader = CropArchiveReader(args.archive_dir)
+    if args.command == "list":
+        per_class = {}
+        tracks = set()
+        total = 0
+        for record in reader.records():
+            key = (record.class_name, VERDICT_NAMES.get(record.verdict, "unknown"))
+            per_class[key] = per_class.get(key, 0) + 1
+            tracks.add(record.track_id)
+            total += 1
+        print(f"{len(reader.shards())} shards, {total} crops, {len(tracks)} tracks")
+        for (class_name, verdict), n in sorted(per_class.items()):
+            print(f"  {class_name:<16}{verdict:<10}{n}")
+    else:
+        n = reader.export(args.out_dir)
+        print(f"Exported {n} crops to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
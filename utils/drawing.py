@@ -6,19 +6,18 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
 
-def draw_boxes(frame, tracks, buffers):
+def draw_boxes(frame, tracks, buffers, scale=1.0):
     """
     Draw bounding boxes, centers, and IDs on the frame.
-    tracks: result from tracker.track()
+    tracks: Tracks from tracker.track() (full-frame coordinates)
     buffers: ObjectAggregator.buffers (to get classification status)
+    scale: size of 'frame' relative to the full frame (e.g. a display-size copy)
     """
-    if tracks[0].boxes is None or tracks[0].boxes.id is None:
+    if tracks is None or len(tracks) == 0:
         return frame
-
-    boxes = tracks[0].boxes.xyxy.cpu().numpy().astype(int)
-    ids = tracks[0].boxes.id.cpu().numpy().astype(int)
     
-    for box, track_id in zip(boxes, ids):
+    boxes = tracks.boxes if scale == 1.0 else (tracks.boxes * scale).astype(int)
+    for box, track_id in zip(boxes, tracks.ids):
         x1, y1, x2, y2 = box
         cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
         
@@ -55,14 +54,38 @@ def draw_boxes(frame, tracks, buffers):
         
     return frame
 
-def draw_counting_line(frame, line_counter):
+def draw_counting_line(frame, line_counter, scale=1.0):
     """
     Draw the counting line.
     """
+    line_pos = int(line_counter.line_pos * scale)
     if line_counter.orientation == "horizontal":
-        cv2.line(frame, (0, line_counter.line_pos), (frame.shape[1], line_counter.line_pos), config.LINE_COLOR, config.LINE_THICKNESS)
+        cv2.line(frame, (0, line_pos), (frame.shape[1], line_pos), config.LINE_COLOR, config.LINE_THICKNESS)
     else:
-        cv2.line(frame, (line_counter.line_pos, 0), (line_counter.line_pos, frame.shape[0]), config.LINE_COLOR, config.LINE_THICKNESS)
+        cv2.line(frame, (line_pos, 0), (line_pos, frame.shape[0]), config.LINE_COLOR, config.LINE_THICKNESS)
+    return frame
+
+def draw_zones(frame, engine, scale=1.0):
+    """
+    Draw extra counting lines / polygon zones with their totals.
+    """
+    for zone in engine.zones:
+        points = zone.points * scale
+        pts = points.astype(int).reshape(-1, 1, 2)
+        cv2.polylines(frame, [pts], zone.kind == "polygon", config.LINE_COLOR, config.LINE_THICKNESS)
+        x, y = points[0].astype(int)
+        cv2.putText(frame, f"{zone.name}: {zone.counts['total']}", (x + 5, y + 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, config.COLOR_TEXT, 2)
+    return frame
+
+def draw_roi(frame, roi, scale=1.0):
+    """
+    Draw the belt region of interest (pixel x1, y1, x2, y2).
+    """
+    if roi is None:
+        return frame
+    x1, y1, x2, y2 = (int(v * scale) for v in roi)
+    cv2.rectangle(frame, (x1, y1), (x2 - 1, y2 - 1), config.COLOR_ROI, 1)
     return frame
 
 def draw_info(frame, counts):
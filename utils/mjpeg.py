@@ -0,0 +1,228 @@
+import cv2
+import numpy as np
+import threading
+import urllib.request
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+SOI = b"\xff\xd8" # JPEG start of image
+EOI = b"\xff\xd9" # JPEG end of image
+
+# Give up on a part that never ends (corrupt stream) after this many bytes
+MAX_BUFFER_BYTES = 16 * 1024 * 1024
+
+class MjpegCapture:
+    """
+    cv2.VideoCapture-like reader for HTTP MJPEG streams (e.g. IP Webcam .../video).
+    A background thread reads the stream as fast as it arrives (parts framed by
+    the multipart boundary and Content-Length) and keeps only the newest JPEG; read() decodes just that one, so frames never queue up
+    behind a slow consumer (older JPEGs are counted in stale_dropped).
+    The connection is re-opened with exponential backoff whenever it fails.
+    """
+    def __init__(self, url, read_timeout=None, reconnect_min=None, reconnect_max=None):
+        self.url = url
+        self.read_timeout = read_timeout if read_timeout else config.NETWORK_READ_TIMEOUT
+        self.reconnect_min = reconnect_min if reconnect_min else config.NETWORK_RECONNECT_MIN_S
+        self.reconnect_max = reconnect_max if reconnect_max else config.NETWORK_RECONNECT_MAX_S
+
+        self.cond = threading.Condition()
+        self.jpeg = None # newest complete JPEG
+        self.jpeg_seq = 0
+        self.read_seq = 0
+        self.arrival = 0.0 # time.monotonic() when the newest JPEG was complete
+        self.frame_arrival = None # arrival time of the JPEG returned by the last read()
+        self.frame_jpeg = None # the JPEG returned by the last read() (for recording)
+
+        self.opened = True
+        self.connected = False
+        self.response = None
+        self.stop_event = threading.Event()
+
+        # Stats
+        self.stale_dropped = 0
+        self.reconnects = 0
+
+        self.thread = threading.Thread(target=self.run, name="mjpeg-reader", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        backoff = self.reconnect_min
+        while not self.stop_event.is_set():
+            try:
+                self.response = urllib.request.urlopen(self.url, timeout=self.read_timeout)
+                self.connected = True
+                print(f"MJPEG stream connected: {self.url}")
+                backoff = self.reconnect_min
+                self.stream(self.response)
+            except (OSError, ValueError) as e:
+                if self.stop_event.is_set():
+                    break
+                print(f"MJPEG stream error: {e}; reconnecting in {backoff:.1f}s")
+            except AttributeError:
+                # http.client fails this way when release() closes the response mid-read
+                if self.stop_event.is_set():
+                    break
+                raise
+            finally:
+                self.connected = False
+                if self.response:
+                    self.response.close()
+                    self.response = None
+
+            if self.stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.reconnect_max)
+            self.reconnects += 1
+
+    def stream(self, response):
+        """
+        Split the stream into JPEGs using the multipart boundary and each part's
+        Content-Length; JPEG marker scanning is only the fallback for streams
+        without them (markers also occur inside EXIF thumbnails and headers).
+        """
+        boundary = None
+        if response.headers.get_content_type().startswith("multipart/"):
+            boundary = response.headers.get_param("boundary")
+        if boundary:
+            self.stream_parts(response, boundary.strip('"').strip("-").encode("latin-1"))
+        else:
+            self.stream_markers(response)
+
+    def stream_parts(self, response, boundary):
+        # Cameras differ in how many dashes they put around the boundary
+        at_boundary = False
+        while not self.stop_event.is_set():
+            if not at_boundary:
+                line = self.readline(response)
+                if line.strip().strip(b"-") != boundary:
+                    continue
+
+            headers = {}
+            while True:
+                line = self.readline(response).strip()
+                if not line:
+                    break
+                name, _, value = line.partition(b":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = headers.get(b"content-length", b"")
+            if length.isdigit():
+                length = int(length)
+                if length > MAX_BUFFER_BYTES:
+                    raise ValueError(f"MJPEG part too large ({length} bytes)")
+                jpeg = response.read(length)
+                if len(jpeg) < length:
+                    raise ConnectionError("stream closed by the camera")
+                at_boundary = False
+            else:
+                # No length: the part ends at the next boundary line (so it is
+                # published one part late)
+                jpeg = self.read_until_boundary(response, boundary)
+                at_boundary = True
+
+            if jpeg.startswith(SOI):
+                self.publish(jpeg, 0)
+
+    def read_until_boundary(self, response, boundary):
+        data = bytearray()
+        while not self.stop_event.is_set():
+            line = self.readline(response)
+            if line.strip().strip(b"-") == boundary:
+                break
+            data += line
+            if len(data) > MAX_BUFFER_BYTES:
+                raise ValueError("MJPEG part without a boundary")
+        # The CRLF before the boundary belongs to the multipart framing
+        return bytes(data[:-2] if data.endswith(b"\r\n") else data)
+
+    @staticmethod
+    def readline(response):
+        line = response.readline(65536)
+        if not line:
+            raise ConnectionError("stream closed by the camera")
+        return line
+
+    def stream_markers(self, response):
+        buf = bytearray()
+        while not self.stop_event.is_set():
+            chunk = response.read1(65536)
+            if not chunk:
+                raise ConnectionError("stream closed by the camera")
+            buf += chunk
+
+            # Only the last complete JPEG in the buffer matters
+            end = buf.rfind(EOI)
+            if end < 0:
+                if len(buf) > MAX_BUFFER_BYTES:
+                    buf.clear()
+                continue
+            start = buf.rfind(SOI, 0, end)
+            if start >= 0:
+                self.publish(bytes(buf[start:end + 2]), buf.count(EOI, 0, start))
+            del buf[:end + 2]
+
+    def publish(self, jpeg, skipped):
+        with self.cond:
+            self.stale_dropped += skipped
+            if self.jpeg_seq > self.read_seq:
+                # The previous JPEG was never read
+                self.stale_dropped += 1
+            self.jpeg = jpeg
+            self.jpeg_seq += 1
+            self.arrival = time.monotonic()
+            self.cond.notify_all()
+
+    def read(self, image=None):
+        """
+        Wait for a JPEG newer than the last one read and decode it.
+        Returns (False, None) if none arrives within read_timeout.
+        """
+        deadline = time.monotonic() + self.read_timeout
+        with self.cond:
+            while self.jpeg_seq <= self.read_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.opened:
+                    return False, None
+                self.cond.wait(remaining)
+            jpeg = self.jpeg
+            self.read_seq = self.jpeg_seq
+            self.frame_arrival = self.arrival
+            self.frame_jpeg = jpeg
+
+        decoded = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if decoded is None:
+            return False, None
+        if image is not None and image.shape == decoded.shape:
+            # Keep using the caller's (pooled) buffer
+            np.copyto(image, decoded)
+            return True, image
+        return True, decoded
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        # Stream FPS is unknown
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+        response = self.response
+        if response:
+            try:
+                response.close()
+            except OSError:
+                pass
+        if self.thread.is_alive():
+            self.thread.join(timeout=2.0)
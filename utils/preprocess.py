@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from detector.tracker import roi_to_pixels
+
+class Letterbox:
+    """
+    Geometry of a model input: belt ROI of the frame, scaled by r and padded.
+    Maps boxes predicted on the model input back to full-frame pixels.
+    """
+    __slots__ = ("roi", "offset", "r", "pad", "shape")
+
+    def __init__(self, roi, offset, r, pad, shape):
+        self.roi = roi # fractional ROI it was made for (config.BELT_ROI)
+        self.offset = offset # (x, y) of the ROI in the frame
+        self.r = r # model pixels per frame pixel
+        self.pad = pad # (left, top) padding in model pixels
+        self.shape = shape # (h, w) of the model input
+
+    def to_frame(self, xyxy):
+        pl, pt = self.pad
+        ox, oy = self.offset
+        return (xyxy - np.array([pl, pt, pl, pt], dtype=xyxy.dtype)) / self.r + np.array([ox, oy, ox, oy])
+
+class FramePreprocessor:
+    """
+    Runs in the capture thread and writes, into buffers kept on each pooled Frame:
+    - frame.model_input: the belt ROI letterboxed to imgsz, RGB, float32 CHW in [0, 1]
+      (what Ultralytics would otherwise build on the detect thread for every call)
+    - frame.display: the frame resized to display_size (BGR, annotated later)
+    The letterbox is 'rect' style like Ultralytics: scaled to fit imgsz (int or
+    (h, w)), then each axis padded only up to a stride multiple, so a wide belt
+    band gives a short, wide input.
+    """
+    def __init__(self, imgsz=None, roi=None, display_size=None, stride=32):
+        imgsz = imgsz if imgsz else (config.INFERENCE_IMGSZ or 640)
+        # Ultralytics accepts an int (square) or (h, w)
+        self.imgsz = (imgsz, imgsz) if isinstance(imgsz, int) else (int(imgsz[0]), int(imgsz[1]))
+        self.roi = roi if roi is not None else config.BELT_ROI
+        self.display_size = display_size # (w, h) or None
+        self.stride = stride
+
+        self.frame_shape = None
+        self.letterbox = None
+        self.bounds = None # ROI in frame pixels
+        # Scratch buffers (capture thread only)
+        self.resized = None
+        self.canvas = None
+
+    def setup(self, frame_shape):
+        roi = roi_to_pixels(self.roi, frame_shape)
+        x1, y1, x2, y2 = roi if roi is not None else (0, 0, frame_shape[1], frame_shape[0])
+        h, w = y2 - y1, x2 - x1
+
+        ih, iw = self.imgsz
+        r = min(ih / h, iw / w)
+        new_w, new_h = max(1, int(round(w * r))), max(1, int(round(h * r)))
+        out_w = int(np.ceil(new_w / self.stride) * self.stride)
+        out_h = int(np.ceil(new_h / self.stride) * self.stride)
+        pad = ((out_w - new_w) // 2, (out_h - new_h) // 2)
+
+        self.frame_shape = frame_shape
+        self.letterbox = Letterbox(self.roi, (x1, y1), r, pad, (out_h, out_w))
+        self.bounds = (x1, y1, x2, y2)
+        self.resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self.canvas = np.full((out_h, out_w, 3), 114, dtype=np.uint8) # Ultralytics pad color
+
+    def run(self, frame):
+        image = frame.image
+        if image.shape != self.frame_shape:
+            self.setup(image.shape)
+        lb = self.letterbox
+        out_h, out_w = lb.shape
+
+        if frame.model_input is None or frame.model_input.shape != (3, out_h, out_w):
+            frame.model_input = np.empty((3, out_h, out_w), dtype=np.float32)
+
+        x1, y1, x2, y2 = self.bounds
+        new_h, new_w = self.resized.shape[:2]
+        cv2.resize(image[y1:y2, x1:x2], (new_w, new_h), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        pl, pt = lb.pad
+        self.canvas[pt:pt + new_h, pl:pl + new_w] = self.resized
+        # BGR -> RGB, HWC -> CHW and scale to [0, 1] in one pass
+        np.multiply(self.canvas[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0,
+                    out=frame.model_input, casting="unsafe")
+        frame.letterbox = lb
+
+        if self.display_size:
+            w, h = self.display_size
+            if frame.display is None or frame.display.shape[:2] != (h, w):
+                frame.display = np.empty((h, w, 3), dtype=np.uint8)
+            cv2.resize(image, (w, h), dst=frame.display, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,179 @@
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+class RetentionManager:
+    """
+    Keeps the crop/log directories within an age limit and a total size quota.
+    All deletion runs on its own thread, so clearing large directories never
+    blocks the GUI or the frame pipeline.
+    - Periodic sweep: delete files older than max_age_hours, then the oldest files
+      until the directories together fit in max_mb.
+    - Clear: delete everything in the directories (GUI "Clear Logs").
+    Files modified in the last min_file_age seconds are left alone by sweeps
+    (e.g. the archive shard currently being written).
+    Archive shards (<name>.bin + <name>.idx) are always deleted as a pair.
+    """
+    def __init__(self, dirs=None, max_age_hours=None, max_mb=None, interval=None,
+                 min_file_age=None, periodic=None, on_report=None):
+        self.dirs = list(dirs) if dirs else list(config.RETENTION_DIRS)
+        self.max_age_hours = max_age_hours if max_age_hours is not None else config.RETENTION_MAX_AGE_HOURS
+        self.max_mb = max_mb if max_mb is not None else config.RETENTION_MAX_MB
+        self.interval = interval if interval else config.RETENTION_INTERVAL
+        self.min_file_age = min_file_age if min_file_age is not None else config.RETENTION_MIN_FILE_AGE
+        self.periodic = periodic if periodic is not None else config.RETENTION_ENABLED
+        self.on_report = on_report if on_report else print
+
+        self.cond = threading.Condition()
+        self.clear_requests = [] # lists of dirs to clear
+        self.running = False
+        self.thread = None
+
+        # Stats
+        self.freed_bytes = 0
+        self.deleted_files = 0
+        self.disk_bytes = 0 # usage of the managed dirs after the last pass
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="retention", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def request_clear(self, dirs=None):
+        """
+        Queue a full clear of dirs (default: all managed dirs). Returns immediately.
+        """
+        with self.cond:
+            self.clear_requests.append(list(dirs) if dirs else list(self.dirs))
+            self.cond.notify()
+
+    def run(self):
+        # None = no periodic sweeps, only wake up for clear requests
+        next_sweep = time.monotonic() if self.periodic else None
+        while True:
+            with self.cond:
+                while self.running and not self.clear_requests:
+                    if next_sweep is None:
+                        self.cond.wait()
+                        continue
+                    timeout = next_sweep - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.cond.wait(timeout)
+                if not self.running:
+                    return
+                requests = self.clear_requests
+                self.clear_requests = []
+
+            for dirs in requests:
+                freed, files = self.clear(dirs)
+                self.on_report(f"Logs cleared: {files} files, {freed / 1e6:.1f} MB freed")
+
+            if next_sweep is not None and time.monotonic() >= next_sweep:
+                next_sweep = time.monotonic() + self.interval
+                freed, files = self.sweep()
+                if files:
+                    self.on_report(f"Retention: deleted {files} old files, {freed / 1e6:.1f} MB freed")
+
+    def scan(self, dirs):
+        """
+        Group the files under dirs into deletion units.
+        Returns a list of [mtime, size, paths], oldest first.
+        """
+        units = {}
+        for root_dir in dirs:
+            for folder, _, files in os.walk(root_dir):
+                for name in files:
+                    path = os.path.join(folder, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    base, ext = os.path.splitext(path)
+                    key = base if ext in (".bin", ".idx") else path
+                    unit = units.get(key)
+                    if unit is None:
+                        units[key] = [st.st_mtime, st.st_size, [path]]
+                    else:
+                        unit[0] = max(unit[0], st.st_mtime)
+                        unit[1] += st.st_size
+                        unit[2].append(path)
+        return sorted(units.values(), key=lambda u: u[0])
+
+    def delete(self, paths):
+        freed, files = 0, 0
+        for path in paths:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            freed += size
+            files += 1
+        self.freed_bytes += freed
+        self.deleted_files += files
+        return freed, files
+
+    def remove_empty_dirs(self, dirs):
+        # Per-track folders left empty (folder storage format); the roots are kept
+        for root_dir in dirs:
+            for folder, _, _ in os.walk(root_dir, topdown=False):
+                if folder != root_dir:
+                    try:
+                        os.rmdir(folder)
+                    except OSError:
+                        pass
+
+    def clear(self, dirs):
+        freed, files = 0, 0
+        for _, _, paths in self.scan(dirs):
+            f, n = self.delete(paths)
+            freed += f
+            files += n
+        self.remove_empty_dirs(dirs)
+        for d in dirs:
+            os.makedirs(d, exist_ok=True)
+        self.disk_bytes = sum(u[1] for u in self.scan(self.dirs))
+        return freed, files
+
+    def sweep(self):
+        units = self.scan(self.dirs)
+        now = time.time()
+        max_age = self.max_age_hours * 3600 if self.max_age_hours else None
+        quota = int(self.max_mb * 1024 * 1024) if self.max_mb else None
+        total = sum(u[1] for u in units)
+        freed, files = 0, 0
+
+        # Oldest first: age limit, then size quota
+        for mtime, size, paths in units:
+            age = now - mtime
+            if age < self.min_file_age:
+                break
+            expired = max_age is not None and age > max_age
+            over_quota = quota is not None and total > quota
+            if not expired and not over_quota:
+                break
+            f, n = self.delete(paths)
+            freed += f
+            files += n
+            total -= size
+
+        if files:
+            self.remove_empty_dirs(self.dirs)
+        self.disk_bytes = total
+        return freed, files
@@ -0,0 +1,346 @@
+import argparse
+import cv2
+import numpy as np
+import struct
+import threading
+import time
+import sys
+import os
+from collections import deque
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+
+# Recorded camera session: a folder of rolling shards, like the crop archive
+# (utils/crop_archive.py). Each shard is a pair of files:
+#   <name>.bin  concatenated payloads (JPEG frames, serial messages)
+#   <name>.idx  fixed-size index records, one per payload (see INDEX_FORMAT)
+# Shards are named by creation time, so sorting them by name gives write order.
+
+# offset, length, wall time, capture time (monotonic), frame seq, kind
+INDEX_FORMAT = "<QIddqB"
+INDEX_SIZE = struct.calcsize(INDEX_FORMAT)
+
+KIND_FRAME = 0
+KIND_SERIAL = 1
+
+class SessionRecord:
+    """
+    One recorded frame or serial event (index entry).
+    """
+    __slots__ = ("shard", "offset", "length", "wall_time", "timestamp", "seq", "kind")
+
+    def __init__(self, shard, offset, length, wall_time, timestamp, seq, kind):
+        self.shard = shard # path of the .bin file
+        self.offset = offset
+        self.length = length
+        self.wall_time = wall_time # unix time (seconds)
+        self.timestamp = timestamp # time.monotonic() at capture / send
+        self.seq = seq # VideoInput frame sequence number (last frame for events)
+        self.kind = kind # KIND_FRAME or KIND_SERIAL
+
+class SessionRecorder:
+    """
+    Records the frames of a VideoInput (and the serial messages sent) from a
+    background thread. Frames are JPEG-encoded there, or stored as received for
+    MJPEG streams. The session is bounded: once it exceeds max_mb the oldest
+    shard is deleted, so it always holds the most recent footage.
+    When the writer cannot keep up, the oldest queued frame is dropped (counted).
+    """
+    def __init__(self, record_dir=None, max_mb=None, shard_mb=None, quality=None, max_queue=None):
+        record_dir = record_dir if record_dir else config.RECORD_DIR
+        self.session_dir = os.path.join(record_dir, f"session_{time.strftime('%Y%m%d_%H%M%S')}")
+        self.max_bytes = int((max_mb if max_mb else config.RECORD_MAX_MB) * 1024 * 1024)
+        self.shard_bytes = int((shard_mb if shard_mb else config.RECORD_SHARD_MB) * 1024 * 1024)
+        self.quality = quality if quality is not None else config.RECORD_JPEG_QUALITY
+        self.max_queue = max_queue if max_queue else config.RECORD_QUEUE_SIZE
+
+        self.pending = deque() # (kind, image or None, payload bytes or None, wall, timestamp, seq)
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.last_seq = 0
+
+        # Writer thread only
+        self.bin_file = None
+        self.idx_file = None
+        self.shard_size = 0
+        self.shard_count = 0
+        self.shards = deque() # (base path, size), oldest first
+        self.total_bytes = 0
+
+        # Stats
+        self.frames_written = 0
+        self.events_written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="session-recorder", daemon=True)
+        self.thread.start()
+        print(f"Recording session to {self.session_dir}")
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+
+    def submit_frame(self, frame, jpeg=None):
+        """
+        Queue a captured utils.video.Frame. The image is copied (the buffer is
+        reused) unless the encoded JPEG is given.
+        """
+        image = frame.image.copy() if jpeg is None else None
+        self.last_seq = frame.seq
+        self.enqueue((KIND_FRAME, image, jpeg, time.time(), frame.timestamp, frame.seq))
+
+    def record_event(self, message):
+        """
+        Record a serial message (e.g. 'F', 'R', 'START'); safe from any thread.
+        """
+        self.enqueue((KIND_SERIAL, None, str(message).encode("utf-8"), time.time(),
+                      time.monotonic(), self.last_seq))
+
+    def enqueue(self, item):
+        with self.cond:
+            if not self.running:
+                return
+            if len(self.pending) >= self.max_queue:
+                # Drop the oldest frame; serial events are always kept
+                for i, queued in enumerate(self.pending):
+                    if queued[0] == KIND_FRAME:
+                        del self.pending[i]
+                        self.dropped += 1
+                        break
+            self.pending.append(item)
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.pending:
+                    break
+                kind, image, payload, wall, timestamp, seq = self.pending.popleft()
+
+            if payload is None:
+                ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+                if not ok:
+                    continue
+                payload = encoded.tobytes()
+            try:
+                self.append(payload, wall, timestamp, seq, kind)
+            except OSError as e:
+                print(f"Session recording failed: {e}")
+                self.close_shard()
+
+        self.close_shard()
+
+    def open_shard(self):
+        self.close_shard()
+        os.makedirs(self.session_dir, exist_ok=True)
+        base = os.path.join(self.session_dir, f"frames_{time.strftime('%Y%m%d_%H%M%S')}_{self.shard_count:04d}")
+        self.shard_count += 1
+        self.bin_file = open(base + ".bin", "ab")
+        self.idx_file = open(base + ".idx", "ab")
+        self.shard_size = 0
+        self.shards.append([base, 0])
+
+    def close_shard(self):
+        if self.bin_file:
+            self.bin_file.close()
+            self.idx_file.close()
+        self.bin_file = None
+        self.idx_file = None
+
+    def append(self, payload, wall, timestamp, seq, kind):
+        if self.bin_file is None or self.shard_size + len(payload) > self.shard_bytes:
+            self.open_shard()
+
+        self.bin_file.write(payload)
+        self.idx_file.write(struct.pack(INDEX_FORMAT, self.shard_size, len(payload), wall,
+                                        timestamp, int(seq), kind))
+        # Flushed per record so a crash loses at most the frame being written
+        self.bin_file.flush()
+        self.idx_file.flush()
+
+        size = len(payload) + INDEX_SIZE
+        self.shard_size += len(payload)
+        self.shards[-1][1] += size
+        self.total_bytes += size
+        if kind == KIND_FRAME:
+            self.frames_written += 1
+        else:
+            self.events_written += 1
+
+        # Bounded size: drop the oldest closed shards
+        while self.total_bytes > self.max_bytes and len(self.shards) > 1:
+            base, shard_size = self.shards.popleft()
+            for ext in (".bin", ".idx"):
+                try:
+                    os.remove(base + ext)
+                except OSError:
+                    pass
+            self.total_bytes -= shard_size
+
+class SessionReader:
+    """
+    Reads the index and payloads of a recorded session folder.
+    """
+    def __init__(self, session_dir):
+        self.session_dir = session_dir
+
+    @staticmethod
+    def is_session(path):
+        return (isinstance(path, str) and os.path.isdir(path)
+                and any(f.endswith(".idx") for f in os.listdir(path)))
+
+    def shards(self):
+        names = sorted(f for f in os.listdir(self.session_dir) if f.endswith(".bin"))
+        return [os.path.join(self.session_dir, f) for f in names]
+
+    def records(self, kind=None):
+        """
+        Yield SessionRecords in recording order (complete entries only).
+        """
+        for bin_path in self.shards():
+            idx_path = bin_path[:-4] + ".idx"
+            if not os.path.exists(idx_path):
+                continue
+            data_size = os.path.getsize(bin_path)
+            with open(idx_path, "rb") as f:
+                raw = f.read()
+            # A trailing partial record (crash while writing) is ignored
+            for start in range(0, len(raw) - INDEX_SIZE + 1, INDEX_SIZE):
+                offset, length, wall, timestamp, seq, rec_kind = struct.unpack_from(INDEX_FORMAT, raw, start)
+                if offset + length > data_size:
+                    break
+                if kind is None or rec_kind == kind:
+                    yield SessionRecord(bin_path, offset, length, wall, timestamp, seq, rec_kind)
+
+    def read_bytes(self, record, f=None):
+        if f is None:
+            with open(record.shard, "rb") as f:
+                f.seek(record.offset)
+                return f.read(record.length)
+        f.seek(record.offset)
+        return f.read(record.length)
+
+class SessionCapture:
+    """
+    cv2.VideoCapture-like replay of a recorded session, used by VideoInput when
+    its source is a session folder. realtime=True reproduces the recorded frame
+    timing; realtime=False delivers frames as fast as they are read.
+    frame_pts is the recorded capture time of the last frame, relative to the
+    first frame (used as the frame time for track timeouts).
+    """
+    def __init__(self, session_dir, realtime=True):
+        self.reader = SessionReader(session_dir)
+        self.realtime = realtime
+        self.frames = list(self.reader.records(KIND_FRAME))
+        self.position = 0
+        self.file = None
+        self.file_path = None
+        self.first_timestamp = self.frames[0].timestamp if self.frames else 0.0
+        self.start_time = None # monotonic time the replay (re)started
+        self.frame_pts = None
+
+        # Stats
+        self.corrupt_frames = 0
+
+        duration = self.frames[-1].timestamp - self.first_timestamp if len(self.frames) > 1 else 0.0
+        self.fps = (len(self.frames) - 1) / duration if duration > 0 else 0.0
+
+    def read(self, image=None):
+        """
+        Returns (False, None) only at the end of the session; undecodable
+        records are skipped (counted in corrupt_frames).
+        """
+        decoded = None
+        while decoded is None:
+            if self.position >= len(self.frames):
+                return False, None
+            record = self.frames[self.position]
+            self.position += 1
+
+            if record.shard != self.file_path:
+                if self.file:
+                    self.file.close()
+                self.file = open(record.shard, "rb")
+                self.file_path = record.shard
+            data = self.reader.read_bytes(record, self.file)
+            decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if decoded is None:
+                self.corrupt_frames += 1
+
+        pts = record.timestamp - self.first_timestamp
+        if self.realtime:
+            if self.start_time is None:
+                self.start_time = time.monotonic() - pts
+            delay = self.start_time + pts - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frame_pts = pts
+
+        if image is not None and image.shape == decoded.shape:
+            np.copyto(image, decoded)
+            return True, image
+        return True, decoded
+
+    def isOpened(self):
+        return bool(self.frames)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.frames)
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            # Rewind / seek (VideoInput loops file sources)
+            self.position = max(0, min(int(value), len(self.frames)))
+            self.start_time = None
+            return True
+        return False
+
+    def release(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a recorded camera session")
+    parser.add_argument("session_dir")
+    args = parser.parse_args()
+
+    reader = SessionReader(args.session_dir)
+    frames = list(reader.records(KIND_FRAME))
+    events = list(reader.records(KIND_SERIAL))
+    if not frames:
+        print(f"No frames in {args.session_dir}")
+        return
+
+    duration = frames[-1].timestamp - frames[0].timestamp
+    print(f"{len(frames)} frames, {duration:.1f}s "
+          f"({(len(frames) - 1) / duration if duration > 0 else 0.0:.1f} fps), "
+          f"{len(reader.shards())} shards")
+    print(f"From {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(frames[0].wall_time))} "
+          f"to {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(frames[-1].wall_time))}")
+    per_message = {}
+    for record in events:
+        message = reader.read_bytes(record).decode("utf-8", "replace")
+        per_message[message] = per_message.get(message, 0) + 1
+    print(f"{len(events)} serial messages: {per_message}")
+    print(f"Replay: python main.py --headless --source {args.session_dir} [--offline]")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,156 @@
 import cv2
 import os
-import datetime
+import threading
+import time
 import sys
+from collections import deque
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import config
+from utils.crop_archive import CropArchiveWriter
 
-# Currently unused but kept if needed for non-orange saving
-def save_crop(crop, track_id, label, is_non_orange=False):
+def save_crop(crop, folder_path, filename=None, quality=None):
     """
-    Save a cropped image to disk.
+    Encode a cropped image as JPEG and write it to folder_path.
+    Returns True on success.
     """
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    filename = f"{timestamp}_ID{track_id}_{label}.jpg"
-    
-    if is_non_orange:
-        path = os.path.join(config.NON_ORANGE_LOG_DIR, filename)
-        cv2.imwrite(path, crop)
+    quality = quality if quality is not None else config.CROP_JPEG_QUALITY
+    filename = filename if filename else f"{int(time.time() * 1000)}.jpg"
+    return cv2.imwrite(os.path.join(folder_path, filename), crop,
+                       [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+
+class CropWriter:
+    """
+    Writes crops from a background thread so JPEG encoding and disk I/O stay
+    off the processing path. The queue is bounded: when the disk cannot keep
+    up, the oldest queued crop is dropped and counted.
+    storage_format: 'archive' (packed shards, see utils.crop_archive) or
+    'folders' (one JPEG per crop in <base_dir>/<class>_<track_id>/).
+    """
+    def __init__(self, max_queue=None, quality=None, storage_format=None):
+        self.max_queue = max_queue if max_queue else config.CROP_WRITER_QUEUE_SIZE
+        self.quality = quality if quality is not None else config.CROP_JPEG_QUALITY
+        self.storage_format = storage_format if storage_format else config.CROP_STORAGE_FORMAT
+
+        self.pending = deque() # (base_dir, crop, meta dict)
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.known_dirs = set() # folders already created
+        self.archives = {} # base_dir -> CropArchiveWriter (writer thread only)
+
+        # Stats
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="crop-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, flush=True):
+        """
+        Stop the writer; with flush=True the crops already queued are written first.
+        """
+        with self.cond:
+            self.running = False
+            if not flush:
+                self.pending.clear()
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+
+    def submit(self, base_dir, crop, track_id, class_name, verdict=-1, bbox=None):
+        """
+        Queue a crop. The crop is copied, so callers may keep drawing on the frame.
+        verdict: -1 unknown, 0 fresh, 1 rotten; bbox: (x1, y1, x2, y2) in the frame.
+        """
+        meta = {
+            "track_id": track_id,
+            "class_name": class_name,
+            "verdict": verdict,
+            "bbox": bbox,
+            "timestamp": time.time(),
+        }
+        item = (base_dir, crop.copy(), meta)
+        with self.cond:
+            if len(self.pending) >= self.max_queue:
+                self.pending.popleft()
+                self.dropped += 1
+            self.pending.append(item)
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                idle = not self.pending
+            if idle:
+                # Make archived crops visible to readers; done outside the lock
+                # so submit() never waits for the disk
+                self.flush_archives()
+
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.pending:
+                    break
+                base_dir, crop, meta = self.pending.popleft()
+
+            if self.storage_format == "archive":
+                self.write_archive(base_dir, crop, meta)
+            else:
+                folder_path = os.path.join(base_dir, f"{meta['class_name']}_{meta['track_id']}")
+                self.write(folder_path, f"{int(meta['timestamp'] * 1000)}.jpg", crop)
+
+        for archive in self.archives.values():
+            archive.close()
+        self.archives = {}
+
+    def flush_archives(self):
+        # archives is only touched by the writer thread
+        for archive in list(self.archives.values()):
+            archive.flush()
+
+    def write_archive(self, base_dir, crop, meta):
+        ok, encoded = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            self.failed += 1
+            return
+
+        archive = self.archives.get(base_dir)
+        if archive is None:
+            archive = self.archives[base_dir] = CropArchiveWriter(base_dir)
+        try:
+            archive.append(encoded.tobytes(), **meta)
+            self.written += 1
+        except OSError as e:
+            print(f"Crop archive write failed: {e}")
+            archive.close()
+            self.failed += 1
+
+    def write(self, folder_path, filename, crop):
+        if folder_path not in self.known_dirs:
+            os.makedirs(folder_path, exist_ok=True)
+            self.known_dirs.add(folder_path)
+
+        if save_crop(crop, folder_path, filename, self.quality):
+            self.written += 1
+            return
+
+        # The folder may have been deleted under us (e.g. logs cleared); retry once
+        self.known_dirs.discard(folder_path)
+        os.makedirs(folder_path, exist_ok=True)
+        self.known_dirs.add(folder_path)
+        if save_crop(crop, folder_path, filename, self.quality):
+            self.written += 1
+        else:
+            self.failed += 1
+
+    def queue_size(self):
+        with self.cond:
+            return len(self.pending)
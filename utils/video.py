@@ -1,54 +1,312 @@
 import cv2
+import numpy as np
+import queue
 import threading
 import time
+import sys
 import os
 
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import config
+from utils.mjpeg import MjpegCapture
+from utils.preprocess import FramePreprocessor
+from utils.session import SessionCapture, SessionReader, SessionRecorder
+
+NETWORK_SCHEMES = ("http", "https", "rtsp", "rtmp")
+
+class Frame:
+    """
+    A captured frame leased from a FramePool.
+    seq increases by one per captured frame; timestamp is time.monotonic() at capture.
+    pts is the frame time used for track timeouts: the capture time for live
+    sources, the position in the video for offline file sources.
+    Whoever holds a Frame must call release() when done with image; the buffer
+    is then reused for a later capture (never while still held).
+    model_input / letterbox / display are filled by a FramePreprocessor (optional)
+    and reused with the buffer.
+    """
+    __slots__ = ("image", "seq", "timestamp", "pts", "pool", "index", "refs",
+                 "model_input", "letterbox", "display")
+
+    def __init__(self, image, pool=None, index=None):
+        self.image = image
+        self.seq = 0
+        self.timestamp = 0.0
+        self.pts = 0.0
+        self.pool = pool
+        self.index = index # buffer index in the pool (None = not pooled)
+        self.refs = 1
+        self.model_input = None
+        self.letterbox = None
+        self.display = None
+
+    def retain(self):
+        if self.pool:
+            self.pool.retain(self)
+        return self
+
+    def release(self):
+        if self.pool:
+            self.pool.release(self)
+
+class FramePool:
+    """
+    Preallocated capture buffers. The capture thread decodes straight into a free
+    buffer, so frames are handed to consumers without copying. Buffers are
+    reference counted and only reused once every holder has released them.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.shape = None
+        self.frames = []
+        self.free = []
+
+        # Captures that found no free buffer and had to allocate
+        self.misses = 0
+
+    def allocate(self, shape, dtype):
+        with self.lock:
+            self.shape = shape
+            self.frames = [Frame(None, self, i) for i in range(self.size)]
+            for frame in self.frames:
+                frame.image = np.empty(shape, dtype=dtype)
+                frame.refs = 0
+            self.free = list(range(self.size - 1, -1, -1))
+
+    def acquire(self):
+        """
+        A free Frame with one reference, or None if all buffers are in use.
+        """
+        with self.lock:
+            if not self.free:
+                self.misses += 1
+                return None
+            frame = self.frames[self.free.pop()]
+            frame.refs = 1
+            return frame
+
+    def retain(self, frame):
+        with self.lock:
+            frame.refs += 1
+
+    def release(self, frame):
+        with self.lock:
+            frame.refs -= 1
+            # Frames of a previous allocation (resolution changed) are just dropped
+            if (frame.refs == 0 and frame.index is not None and frame.index < len(self.frames)
+                    and self.frames[frame.index] is frame):
+                self.free.append(frame.index)
+
+    def in_use(self):
+        with self.lock:
+            return len(self.frames) - len(self.free)
+
 class VideoInput:
     """
     A threaded video input class to ensure the main processing loop isn't blocked by camera I/O.
+    Every captured frame gets a sequence number and capture timestamp. read_new()
+    hands out the newest unseen frame without copying (see Frame / FramePool).
+
+    Offline mode (video files only): every frame is delivered exactly once, in
+    order, through a bounded queue. Capture blocks while the queue is full instead
+    of dropping frames, runs as fast as the consumer allows (no real-time
+    pacing) and ends at the end of the file (read_new returns None, ended is set).
+
+    Network sources (http://, rtsp://, ...): only the freshest frame is kept.
+    HTTP MJPEG streams use MjpegCapture (NETWORK_READER = 'mjpeg'); other streams
+    use OpenCV with a 1-frame buffer that is read continuously. A failed stream is
+    reconnected with exponential backoff instead of ending the capture thread.
+
+    Sessions: with record=True (RECORD_SESSIONS) every captured frame and the
+    serial messages are recorded (utils.session). A recorded session folder can
+    be used as the source: it is replayed with its original timing, or as fast
+    as possible in offline mode.
     """
-    def __init__(self, source=0, width=1280, height=720, fps=30):
+    def __init__(self, source=0, width=1280, height=720, fps=30, pool_size=None, offline=None,
+                 preprocess=None, display=True, record=None):
         self.source = source
         self.width = width
         self.height = height
         self.target_fps = fps
-        
-        self.cap = cv2.VideoCapture(self.source)
-        
-        # Set resolution
-        # Note: Some cameras might not support exact requested resolution
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-        self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
-        
-        self.grabbed, self.frame = self.cap.read()
+
+        self.network = isinstance(source, str) and source.split("://")[0].lower() in NETWORK_SCHEMES
+        self.reconnects = 0
+        self.backoff = config.NETWORK_RECONNECT_MIN_S
+        self.session = SessionReader.is_session(source)
+
+        offline = offline if offline is not None else config.VIDEO_OFFLINE
+        self.offline = offline and (self.session or (isinstance(source, str) and os.path.isfile(source)))
+
+        self.cap = self.open()
+
+        record = record if record is not None else config.RECORD_SESSIONS
+        self.recorder = SessionRecorder() if record and not self.session else None
+        self.frame_queue = queue.Queue(maxsize=config.OFFLINE_QUEUE_SIZE) if self.offline else None
+        self.ended = False # offline: end of stream reached by the reader
+
+        pool_size = pool_size if pool_size else config.FRAME_POOL_SIZE
+        if self.offline:
+            # Queued frames hold their buffers too
+            pool_size += config.OFFLINE_QUEUE_SIZE
+        self.pool = FramePool(pool_size)
+
+        # Model input / display image built here instead of on the detect/GUI threads
+        preprocess = preprocess if preprocess is not None else config.PREPROCESS_IN_CAPTURE
+        display_size = config.PREPROCESS_DISPLAY_SIZE if display else None
+        self.preprocessor = FramePreprocessor(display_size=display_size) if preprocess else None
+
         self.started = False
-        self.read_lock = threading.Lock()
+        self.read_lock = threading.Condition()
         self.stopped = False
+        self.thread = None
+
+        # Newest captured frame (this object holds one reference to it)
+        self.latest = None
+        self.seq = 0
+        self.last_read_seq = 0
 
         # Get the actual FPS of the video source
         self.fps = self.cap.get(cv2.CAP_PROP_FPS)
         if self.fps <= 0 or self.fps > 1000:
              # Fallback if FPS is not valid
             self.fps = self.target_fps
-        
+
         self.frame_delay = 1.0 / self.fps
 
+        grabbed, image = self.cap.read()
+        self.grabbed = grabbed
+        if grabbed:
+            self.pool.allocate(image.shape, image.dtype)
+            frame = Frame(image)
+            if self.preprocessor:
+                self.preprocessor.run(frame)
+            self.publish(frame)
+
+    def open(self):
+        if self.session:
+            return SessionCapture(self.source, realtime=not self.offline)
+        if self.network and config.NETWORK_READER == "mjpeg" and self.source.lower().startswith("http"):
+            return MjpegCapture(self.source)
+
+        cap = cv2.VideoCapture(self.source)
+        if self.network:
+            # Do not let OpenCV queue up stale frames
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Set resolution
+        # Note: Some cameras might not support exact requested resolution
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        cap.set(cv2.CAP_PROP_FPS, self.target_fps)
+        return cap
+
+    def reconnect(self):
+        """
+        Re-open a failed network stream after an exponential backoff.
+        """
+        print(f"Video stream lost, reconnecting in {self.backoff:.1f}s")
+        self.cap.release()
+        deadline = time.monotonic() + self.backoff
+        while not self.stopped and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.backoff = min(self.backoff * 2, config.NETWORK_RECONNECT_MAX_S)
+        self.reconnects += 1
+        if not self.stopped:
+            self.cap = self.open()
+
     def start(self):
         if self.started:
             return self
         self.started = True
+        if self.recorder:
+            self.recorder.start()
         self.thread = threading.Thread(target=self.update, args=())
         self.thread.daemon = True
         self.thread.start()
         return self
 
+    def capture(self):
+        """
+        Read the next frame into a pooled buffer. Returns a Frame or None.
+        """
+        frame = self.pool.acquire()
+        grabbed, image = self.cap.read(frame.image if frame else None)
+        if not grabbed:
+            if frame:
+                frame.release()
+            return None
+
+        if frame is None or image is not frame.image:
+            # No free buffer, or the source changed resolution and OpenCV allocated
+            if frame:
+                frame.release()
+            if self.pool.shape != image.shape:
+                self.pool.allocate(image.shape, image.dtype)
+            frame = Frame(image)
+
+        if self.preprocessor:
+            self.preprocessor.run(frame)
+        return frame
+
+    def publish(self, frame):
+        self.seq += 1
+        frame.seq = self.seq
+        # MJPEG: when the JPEG finished arriving, so latency includes decoding/waiting
+        frame.timestamp = getattr(self.cap, "frame_arrival", None) or time.monotonic()
+        if self.offline:
+            # Recorded sessions keep their original frame timing
+            frame.pts = self.cap.frame_pts if self.session else (self.seq - 1) / self.fps
+        else:
+            frame.pts = frame.timestamp
+
+        if self.recorder:
+            # MJPEG frames are stored as received (no re-encoding)
+            self.recorder.submit_frame(frame, getattr(self.cap, "frame_jpeg", None))
+
+        if self.offline:
+            # Backpressure: wait for the consumer instead of dropping the frame
+            frame.retain()
+            while not self.stopped:
+                try:
+                    self.frame_queue.put(frame, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                frame.release()
+
+        with self.read_lock:
+            old = self.latest
+            self.latest = frame
+            self.grabbed = True
+            self.read_lock.notify_all()
+        if old:
+            old.release()
+
     def update(self):
         while not self.stopped:
             start_time = time.time()
-            grabbed, frame = self.cap.read()
-            
-            if not grabbed:
+            frame = self.capture()
+
+            if frame is None and self.offline:
+                # End of stream: no looping in offline mode
+                while not self.stopped:
+                    try:
+                        self.frame_queue.put(None, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                break
+
+            if frame is None and self.network:
+                # MjpegCapture reconnects by itself; its read() already waited
+                if not isinstance(self.cap, MjpegCapture):
+                    self.reconnect()
+                continue
+
+            if frame is None:
                 # If reading failed, it might be end of video file.
                 # Check if it's a file (source is str) and loop
                 if isinstance(self.source, str) and os.path.exists(self.source):
@@ -58,29 +316,88 @@ class VideoInput:
                     # Camera disconnected or error
                     with self.read_lock:
                         self.grabbed = False
+                        self.read_lock.notify_all()
                     break
 
-            with self.read_lock:
-                self.grabbed = grabbed
-                self.frame = frame
-            
+            self.publish(frame)
+            self.backoff = config.NETWORK_RECONNECT_MIN_S
+            if self.offline or self.network or self.session:
+                # No pacing: offline runs as fast as possible, streams are drained,
+                # session replay paces itself from the recorded timestamps
+                continue
+
             # Control playback speed to match FPS
             elapsed = time.time() - start_time
             delay = self.frame_delay - elapsed
             if delay > 0:
-                time.sleep(delay) 
+                time.sleep(delay)
+
+    def read_new(self, timeout=None, last_seq=None):
+        """
+        Wait up to timeout seconds for a frame newer than last_seq (default: the
+        last frame returned by read_new) and return it without copying.
+        The caller owns the returned Frame and must release() it.
+        Returns None on timeout or when the source has stopped.
+        Offline mode: returns the next queued frame (never skips one).
+        """
+        if self.offline:
+            return self.read_queued(timeout)
+
+        last_seq = last_seq if last_seq is not None else self.last_read_seq
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.read_lock:
+            while self.latest is None or self.latest.seq <= last_seq:
+                if self.stopped:
+                    return None
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.read_lock.wait(remaining)
+            frame = self.latest.retain()
+        self.last_read_seq = frame.seq
+        return frame
+
+    def read_queued(self, timeout):
+        if self.ended:
+            return None
+        try:
+            frame = self.frame_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if frame is None:
+            self.ended = True
+            return None
+        self.last_read_seq = frame.seq
+        return frame
 
     def read(self):
+        """
+        Copy of the newest frame (may return the same frame twice; see read_new).
+        """
         with self.read_lock:
-            if not self.grabbed:
+            if not self.grabbed or self.latest is None:
                 return None
-            return self.frame.copy()
+            return self.latest.image.copy()
+
+    def get_stats(self):
+        """
+        Stream health: reconnects, frames dropped because a newer one arrived and
+        undecodable frames skipped in a replayed session.
+        """
+        stale = self.cap.stale_dropped if isinstance(self.cap, MjpegCapture) else 0
+        reconnects = self.cap.reconnects if isinstance(self.cap, MjpegCapture) else self.reconnects
+        corrupt = self.cap.corrupt_frames if isinstance(self.cap, SessionCapture) else 0
+        return {"stream_reconnects": reconnects, "stale_frames_dropped": stale, "corrupt_frames": corrupt}
 
     def stop(self):
         self.stopped = True
-        if self.thread.is_alive():
+        with self.read_lock:
+            self.read_lock.notify_all()
+        if self.thread and self.thread.is_alive():
             self.thread.join()
         self.cap.release()
+        if self.recorder:
+            self.recorder.stop()
 
     def is_opened(self):
         return self.cap.isOpened()